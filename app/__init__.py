@@ -1,4 +1,5 @@
 from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
@@ -16,16 +17,38 @@ socketio = SocketIO()
 csrf = CSRFProtect()
 limiter = Limiter(key_func=get_remote_address)
 
+class StaticRequestFilteringSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that are never opened or saved for static files.
+
+    Logos, menu images and QR codes are all served from the static folder and
+    never read the session, so skip decoding and verifying the cookie for them.
+    """
+
+    def __init__(self, app):
+        self.static_prefix = app.static_url_path + '/'
+
+    def open_session(self, app, request):
+        if request.path.startswith(self.static_prefix):
+            return self.null_session_class()
+        return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if isinstance(session, self.null_session_class):
+            return
+        return super().save_session(app, session, response)
+
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.session_interface = StaticRequestFilteringSessionInterface(app)
 
     os.makedirs(app.config['QR_CODE_FOLDER'], exist_ok=True)
 
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    socketio.init_app(app, cors_allowed_origins="*", message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
     csrf.init_app(app)
     limiter.init_app(app)
 
@@ -47,6 +70,7 @@ def create_app(config_class=Config):
     from app.routes.compliance import compliance_bp  # Compliance routes
     from app.routes.health import health_bp  # Health check routes
     from app.api.v1 import api_v1_bp  # Versioned API v1
+    from app.services import realtime_service  # noqa: F401 - registers Socket.IO room handlers
 
     csrf.exempt(auth_bp)
     csrf.exempt(restaurants_bp)
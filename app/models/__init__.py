@@ -1,8 +1,34 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from sqlalchemy.orm import joinedload
 import uuid
 
+# Feature name -> PricingPlan flag column checked by Restaurant.has_feature
+_PLAN_FEATURE_FLAGS = {
+    'kitchen_display': 'has_kitchen_display',
+    'customer_display': 'has_customer_display',
+    'owner_dashboard': 'has_owner_dashboard',
+    'advanced_analytics': 'has_advanced_analytics',
+    'qr_ordering': 'has_qr_ordering',
+    'table_management': 'has_table_management',
+    'order_history': 'has_order_history',
+    'customer_feedback': 'has_customer_feedback',
+    'inventory_management': 'has_inventory_management',
+    'staff_management': 'has_staff_management',
+    'multi_language': 'has_multi_language',
+    'custom_branding': 'has_custom_branding',
+    'email_notifications': 'has_email_notifications',
+    'sms_notifications': 'has_sms_notifications',
+    'api_access': 'has_api_access',
+    'priority_support': 'has_priority_support',
+    'white_label': 'has_white_label',
+    'reports_export': 'has_reports_export',
+    'pos_integration': 'has_pos_integration',
+    'payment_integration': 'has_payment_integration',
+}
+
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -27,6 +53,21 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    @classmethod
+    def get_with_restaurant(cls, user_id):
+        """Load a user by id with its restaurant joined in, since owner views go on to read it"""
+        return db.session.get(cls, user_id, options=[joinedload(cls.restaurant)])
+
+    @classmethod
+    def find_taken_field(cls, username, email):
+        """Return 'username' or 'email' if already in use (username checked first), else None, in one query"""
+        taken = db.session.query(cls.username).filter(
+            db.or_(cls.username == username, cls.email == email)
+        ).all()
+        if any(row.username == username for row in taken):
+            return 'username'
+        return 'email' if taken else None
+
     def to_dict(self):
         return {
             'id': self.public_id,
@@ -110,11 +151,19 @@ class Restaurant(db.Model):
     # Add late import to avoid circular imports
     @property
     def pricing_plan(self):
-        """Get the pricing plan for this restaurant"""
-        if self.pricing_plan_id:
+        """Get the pricing plan for this restaurant.
+
+        Templates and decorators call this (via has_feature) many times per
+        request, so the plan is remembered on the instance, keyed by
+        pricing_plan_id. Instances live only as long as the request's session.
+        """
+        if not self.pricing_plan_id:
+            return None
+        cached = self.__dict__.get('_pricing_plan_cache')
+        if cached is None or cached[0] != self.pricing_plan_id:
             from app.models.website_content_models import PricingPlan
-            return PricingPlan.query.get(self.pricing_plan_id)
-        return None
+            cached = self._pricing_plan_cache = (self.pricing_plan_id, db.session.get(PricingPlan, self.pricing_plan_id))
+        return cached[1]
 
     def has_feature(self, feature_name):
         """Check if restaurant has access to a specific feature based on plan"""
@@ -122,29 +171,8 @@ class Restaurant(db.Model):
         if not plan:
             return False  # No plan = no features
 
-        feature_map = {
-            'kitchen_display': plan.has_kitchen_display,
-            'customer_display': plan.has_customer_display,
-            'owner_dashboard': plan.has_owner_dashboard,
-            'advanced_analytics': plan.has_advanced_analytics,
-            'qr_ordering': plan.has_qr_ordering,
-            'table_management': plan.has_table_management,
-            'order_history': plan.has_order_history,
-            'customer_feedback': plan.has_customer_feedback,
-            'inventory_management': plan.has_inventory_management,
-            'staff_management': plan.has_staff_management,
-            'multi_language': plan.has_multi_language,
-            'custom_branding': plan.has_custom_branding,
-            'email_notifications': plan.has_email_notifications,
-            'sms_notifications': plan.has_sms_notifications,
-            'api_access': plan.has_api_access,
-            'priority_support': plan.has_priority_support,
-            'white_label': plan.has_white_label,
-            'reports_export': plan.has_reports_export,
-            'pos_integration': plan.has_pos_integration,
-            'payment_integration': plan.has_payment_integration
-        }
-        return feature_map.get(feature_name, False)
+        flag = _PLAN_FEATURE_FLAGS.get(feature_name)
+        return getattr(plan, flag) if flag else False
 
     def get_limit(self, limit_name):
         """Get a specific limit from the plan"""
@@ -229,7 +257,7 @@ class Category(db.Model):
     description = db.Column(db.Text)
     sort_order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
-    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurants.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     items = db.relationship('MenuItem', backref='category', lazy=True, cascade='all, delete-orphan')
@@ -316,10 +344,22 @@ class Order(db.Model):
 
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
 
-    # Index for efficient restaurant + display number lookups
+    # Indexes for restaurant-scoped lookups (display number, status, date ranges)
     __table_args__ = (
         db.Index('ix_order_restaurant_display', 'restaurant_id', 'display_order_number'),
-        db.Index('ix_order_restaurant_status', 'restaurant_id', 'status'),
+        # Also serves (restaurant_id, status) lookups; created_at last so status
+        # scans come back already ordered by time
+        db.Index('ix_order_restaurant_status_created', 'restaurant_id', 'status', 'created_at'),
+        # id breaks created_at ties for the orders list's keyset pagination
+        db.Index('ix_order_restaurant_created_id', 'restaurant_id', 'created_at', 'id'),
+        # Partial index over in-flight orders only, for the customer screen;
+        # completed history never enters it, so it stays small and hot. status
+        # lives only in the predicate so the key differs from the index above
+        db.Index(
+            'ix_order_active', 'restaurant_id', 'created_at',
+            postgresql_where=db.text("status IN ('pending', 'preparing', 'ready')"),
+            sqlite_where=db.text("status IN ('pending', 'preparing', 'ready')"),
+        ),
     )
 
     def generate_order_number(self):
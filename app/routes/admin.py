@@ -4,6 +4,7 @@ from app import db
 from app.models import User, Restaurant, Order, Category, Table, MenuItem, ApiKey, RegistrationRequest, ModerationLog, SystemSettings
 from app.services.qr_service import generate_restaurant_qr_code, generate_qr_code
 from app.hardcoded_admin import check_hardcoded_admin, SUPER_ADMIN
+from app.utils import csv_upload_reader
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 import os
@@ -231,11 +232,12 @@ def owner_signup():
             return redirect(url_for('admin.owner_login'))
 
         # Check if username or email already exists
-        if User.query.filter_by(username=username).first():
+        taken = User.find_taken_field(username, email)
+        if taken == 'username':
             flash('Username already exists', 'error')
             return redirect(url_for('admin.owner_login'))
 
-        if User.query.filter_by(email=email).first():
+        if taken == 'email':
             flash('Email already registered', 'error')
             return redirect(url_for('admin.owner_login'))
 
@@ -1218,11 +1220,12 @@ def create_restaurant():
         flash('Password must be at least 6 characters', 'error')
         return redirect(url_for('admin.restaurants'))
 
-    if User.query.filter_by(username=owner_username).first():
+    taken = User.find_taken_field(owner_username, owner_email)
+    if taken == 'username':
         flash('Username already exists', 'error')
         return redirect(url_for('admin.restaurants'))
 
-    if User.query.filter_by(email=owner_email).first():
+    if taken == 'email':
         flash('Email already exists', 'error')
         return redirect(url_for('admin.restaurants'))
 
@@ -1437,9 +1440,6 @@ def import_menu_csv(restaurant_id):
     Import menu items from CSV file.
     Expected CSV format: category,name,description,price,is_available
     """
-    import csv
-    import io
-
     restaurant = Restaurant.query.get_or_404(restaurant_id)
 
     if 'csv_file' not in request.files:
@@ -1457,9 +1457,7 @@ def import_menu_csv(restaurant_id):
         return redirect(url_for('admin.restaurant_detail', restaurant_id=restaurant_id))
 
     try:
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode('utf-8'))
-        csv_reader = csv.DictReader(stream)
+        csv_reader = csv_upload_reader(file)
 
         # Validate required headers
         required_headers = ['category', 'name', 'price']
@@ -1477,6 +1475,20 @@ def import_menu_csv(restaurant_id):
         categories_created = 0
         errors = []
 
+        # Look categories and existing items up in memory instead of running
+        # two SELECTs (and a flush per new category) for every row
+        categories_by_name = {}
+        for category in Category.query.filter_by(restaurant_id=restaurant.id):
+            categories_by_name.setdefault(category.name, category)
+        items_by_key = {}
+        for item, item_category_name in db.session.query(MenuItem, Category.name).join(
+            Category, Category.id == MenuItem.category_id
+        ).filter(Category.restaurant_id == restaurant.id):
+            items_by_key.setdefault((item_category_name, item.name), item)
+        next_sort_order = (db.session.query(db.func.max(Category.sort_order)).filter(
+            Category.restaurant_id == restaurant.id
+        ).scalar() or 0) + 1
+
         for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (header is row 1)
             try:
                 # Get values (case-insensitive column matching)
@@ -1502,27 +1514,22 @@ def import_menu_csv(restaurant_id):
                 is_available = is_available_str in ['true', 'yes', '1', 'available', 'y']
 
                 # Get or create category
-                category = Category.query.filter_by(
-                    restaurant_id=restaurant.id,
-                    name=category_name
-                ).first()
+                category = categories_by_name.get(category_name)
 
                 if not category:
                     category = Category(
                         name=category_name,
                         restaurant_id=restaurant.id,
                         is_active=True,
-                        sort_order=0
+                        sort_order=next_sort_order
                     )
                     db.session.add(category)
-                    db.session.flush()  # Get the ID
+                    categories_by_name[category_name] = category
+                    next_sort_order += 1
                     categories_created += 1
 
                 # Check if item already exists in this category
-                existing_item = MenuItem.query.filter_by(
-                    category_id=category.id,
-                    name=item_name
-                ).first()
+                existing_item = items_by_key.get((category_name, item_name))
 
                 if existing_item:
                     # Update existing item
@@ -1539,9 +1546,10 @@ def import_menu_csv(restaurant_id):
                         price=price,
                         is_available=is_available,
                         image_url=image_url if image_url else None,
-                        category_id=category.id
+                        category=category
                     )
                     db.session.add(item)
+                    items_by_key[(category_name, item_name)] = item
 
                 items_imported += 1
 
@@ -1686,11 +1694,12 @@ def create_admin_user():
         flash('Invalid role', 'error')
         return redirect(url_for('admin.users'))
 
-    if User.query.filter_by(username=username).first():
+    taken = User.find_taken_field(username, email)
+    if taken == 'username':
         flash('Username already exists', 'error')
         return redirect(url_for('admin.users'))
 
-    if User.query.filter_by(email=email).first():
+    if taken == 'email':
         flash('Email already exists', 'error')
         return redirect(url_for('admin.users'))
 
@@ -1841,13 +1850,20 @@ def orders():
     restaurants = Restaurant.query.order_by(Restaurant.name).all()
 
     # Calculate statistics
-    stats_query = Order.query
+    # One row per status with its count and revenue, folded in a single pass
+    stats_query = db.session.query(
+        Order.status, db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_price), 0)
+    )
     if restaurant_id:
-        stats_query = stats_query.filter_by(restaurant_id=restaurant_id)
-    all_filtered_orders = stats_query.all()
-    total_orders = len(all_filtered_orders)
-    total_revenue = sum(o.total_price for o in all_filtered_orders)
-    pending_orders = sum(1 for o in all_filtered_orders if o.status == 'pending')
+        stats_query = stats_query.filter(Order.restaurant_id == restaurant_id)
+    total_orders = 0
+    total_revenue = 0
+    pending_orders = 0
+    for order_status, count, revenue in stats_query.group_by(Order.status):
+        total_orders += count
+        total_revenue += revenue
+        if order_status == 'pending':
+            pending_orders = count
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
 
     stats = {
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from app import db, limiter
 from app.models import User
-from app.schemas import validate_required_fields, json_response, error_response
+from app.schemas import validate_required_fields, json_response, error_response, token_claims
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -26,10 +26,11 @@ def register():
     if validation:
         return validation
 
-    if User.query.filter_by(username=data['username']).first():
+    taken = User.find_taken_field(data['username'], data['email'])
+    if taken == 'username':
         return error_response('Username already exists', 400)
 
-    if User.query.filter_by(email=data['email']).first():
+    if taken == 'email':
         return error_response('Email already exists', 400)
 
     user = User(
@@ -44,7 +45,7 @@ def register():
 
     access_token = create_access_token(
         identity=user.public_id,
-        additional_claims={'role': user.role}
+        additional_claims=token_claims(user)
     )
     refresh_token = create_refresh_token(identity=user.public_id)
 
@@ -73,7 +74,7 @@ def login():
 
     access_token = create_access_token(
         identity=user.public_id,
-        additional_claims={'role': user.role}
+        additional_claims=token_claims(user)
     )
     refresh_token = create_refresh_token(identity=user.public_id)
 
@@ -94,7 +95,7 @@ def refresh():
 
     access_token = create_access_token(
         identity=user.public_id,
-        additional_claims={'role': user.role}
+        additional_claims=token_claims(user)
     )
 
     return json_response({'access_token': access_token})
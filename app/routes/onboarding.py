@@ -28,7 +28,7 @@ def get_current_owner():
     """Get the currently logged in owner"""
     user_id = session.get('owner_user_id')
     if user_id:
-        return User.query.get(user_id)
+        return User.get_with_restaurant(user_id)
     return None
 
 
@@ -1,24 +1,29 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from app import db
-from app.models import User, Restaurant, Order, OrderItem, MenuItem, Table
-from app.schemas import validate_required_fields, json_response, error_response, role_required
+from app.models import Restaurant, Order, OrderItem, MenuItem, Category, Table
+from app.schemas import validate_required_fields, json_response, error_response, role_required, get_claimed_restaurant_id
 from app.services.order_number_service import OrderNumberService, OrderNumberConfig
-from datetime import datetime
+from app.services.realtime_service import notify_new_order, notify_order_update
+from sqlalchemy import Integer, Text, column, func, insert, literal, select, values
+from datetime import datetime, time
 import uuid
 
 orders_bp = Blueprint('orders', __name__)
 
+# Each cart line binds three parameters in create_order's VALUES list, so
+# this keeps a single order well under SQLite's host-parameter limit
+MAX_ORDER_LINES = 100
+
 @orders_bp.route('', methods=['GET'])
 @jwt_required()
 @role_required('restaurant_owner', 'system_admin')
 def get_orders():
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
     status = request.args.get('status')
-    query = Order.query.filter_by(restaurant_id=user.restaurant.id)
+    query = Order.query.filter_by(restaurant_id=restaurant_id)
     if status:
         query = query.filter_by(status=status)
     orders = query.order_by(Order.created_at.desc()).all()
@@ -28,11 +33,10 @@ def get_orders():
 @jwt_required()
 @role_required('restaurant_owner', 'system_admin')
 def get_order(order_id):
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
-    order = Order.query.filter_by(id=order_id, restaurant_id=user.restaurant.id).first()
+    order = Order.query.filter_by(id=order_id, restaurant_id=restaurant_id).first()
     if not order:
         return error_response('Order not found', 404)
     return json_response(order.to_dict())
@@ -49,9 +53,8 @@ def lookup_order():
     - display_number: The 4-digit display number (e.g., "0042" or "42" or "#42")
     - internal_id: The UUID internal order ID
     """
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
 
     display_number = request.args.get('display_number')
@@ -63,13 +66,13 @@ def lookup_order():
         if not parsed:
             return error_response('Invalid display number format', 400)
 
-        order = OrderNumberService.lookup_by_display_number(user.restaurant.id, parsed)
+        order = OrderNumberService.lookup_by_display_number(restaurant_id, parsed)
         if order:
             return json_response(order.to_dict())
 
         # If not found in active slots, search historical
         order = Order.query.filter_by(
-            restaurant_id=user.restaurant.id,
+            restaurant_id=restaurant_id,
             display_order_number=parsed
         ).order_by(Order.created_at.desc()).first()
 
@@ -80,7 +83,7 @@ def lookup_order():
 
     if internal_id:
         order = OrderNumberService.lookup_by_internal_id(internal_id)
-        if order and order.restaurant_id == user.restaurant.id:
+        if order and order.restaurant_id == restaurant_id:
             return json_response(order.to_dict())
         return error_response('Order not found', 404)
 
@@ -99,9 +102,8 @@ def search_orders():
     - include_completed: Whether to include completed orders (default: false)
     - limit: Maximum results (default: 20)
     """
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
 
     query = request.args.get('q', '').strip()
@@ -112,7 +114,7 @@ def search_orders():
         return error_response('Search query is required', 400)
 
     orders = OrderNumberService.search_orders(
-        restaurant_id=user.restaurant.id,
+        restaurant_id=restaurant_id,
         query=query,
         include_completed=include_completed,
         limit=limit
@@ -126,9 +128,8 @@ def search_orders():
 @role_required('restaurant_owner', 'system_admin')
 def update_order_status(order_id):
     data = request.get_json()
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
     validation = validate_required_fields(data, ['status'])
     if validation:
@@ -136,7 +137,7 @@ def update_order_status(order_id):
     valid_statuses = ['pending', 'preparing', 'served', 'completed', 'cancelled']
     if data['status'] not in valid_statuses:
         return error_response(f'Invalid status. Must be one of: {", ".join(valid_statuses)}', 400)
-    order = Order.query.filter_by(id=order_id, restaurant_id=user.restaurant.id).first()
+    order = Order.query.filter_by(id=order_id, restaurant_id=restaurant_id).first()
     if not order:
         return error_response('Order not found', 404)
 
@@ -148,42 +149,48 @@ def update_order_status(order_id):
         order.release_display_number()
 
     db.session.commit()
+    notify_order_update(restaurant_id, {'restaurant_id': restaurant_id})
     return json_response(order.to_dict(), 'Order status updated')
 
 @orders_bp.route('/active', methods=['GET'])
 @jwt_required()
 @role_required('restaurant_owner', 'system_admin')
 def get_active_orders():
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
 
     # Use the service to get active orders with display numbers
-    orders = OrderNumberService.get_active_orders_with_display(user.restaurant.id)
+    orders = OrderNumberService.get_active_orders_with_display(restaurant_id)
     return json_response(orders)
 
 @orders_bp.route('/stats', methods=['GET'])
 @jwt_required()
 @role_required('restaurant_owner', 'system_admin')
 def get_order_stats():
-    identity = get_jwt_identity()
-    user = User.query.filter_by(public_id=identity).first()
-    if not user.restaurant:
+    restaurant_id = get_claimed_restaurant_id()
+    if not restaurant_id:
         return error_response('No restaurant found', 404)
-    today = datetime.utcnow().date()
-    today_orders = Order.query.filter(
-        Order.restaurant_id == user.restaurant.id,
-        db.func.date(Order.created_at) == today
-    ).all()
-    total_orders = len(today_orders)
-    total_revenue = sum(o.total_price for o in today_orders)
-    pending = sum(1 for o in today_orders if o.status == 'pending')
-    preparing = sum(1 for o in today_orders if o.status == 'preparing')
-    completed = sum(1 for o in today_orders if o.status == 'completed')
+    today_start = datetime.combine(datetime.utcnow().date(), time.min)
+    # One row per status with its count and revenue, folded in a single pass
+    status_counts = {}
+    total_orders = 0
+    total_revenue = 0
+    for status, count, revenue in db.session.query(
+        Order.status, func.count(Order.id), func.coalesce(func.sum(Order.total_price), 0)
+    ).filter(
+        Order.restaurant_id == restaurant_id,
+        Order.created_at >= today_start
+    ).group_by(Order.status):
+        status_counts[status] = count
+        total_orders += count
+        total_revenue += revenue
+    pending = status_counts.get('pending', 0)
+    preparing = status_counts.get('preparing', 0)
+    completed = status_counts.get('completed', 0)
 
     # Include display number slot stats
-    slot_stats = OrderNumberService.get_slot_stats(user.restaurant.id)
+    slot_stats = OrderNumberService.get_slot_stats(restaurant_id)
 
     return json_response({
         'today_orders': total_orders,
@@ -206,6 +213,36 @@ def create_order():
         if not restaurant or not restaurant.is_active:
             return error_response('Restaurant not found or inactive', 404)
 
+        if not data['items'] or not isinstance(data['items'], list):
+            return error_response('Items are required', 400)
+        if len(data['items']) > MAX_ORDER_LINES:
+            return error_response(f'An order can have at most {MAX_ORDER_LINES} items', 400)
+
+        requested_rows = []
+        for item_data in data['items']:
+            try:
+                requested_rows.append((
+                    int(item_data.get('menu_item_id')),
+                    int(item_data.get('quantity', 1)),
+                    item_data.get('notes')
+                ))
+            except (TypeError, ValueError, AttributeError):
+                continue
+
+        # Reject the order before anything is written: allocating the display
+        # number commits, so a failed order could not be rolled back later
+        orderable_items = (
+            MenuItem.is_available,
+            Category.restaurant_id == restaurant.id
+        )
+        has_valid_item = requested_rows and db.session.execute(
+            select(MenuItem.id).join(Category, Category.id == MenuItem.category_id).where(
+                MenuItem.id.in_({row[0] for row in requested_rows}), *orderable_items
+            ).limit(1)
+        ).first()
+        if not has_valid_item:
+            return error_response('No valid items in order', 400)
+
         # Validate table and access token if provided
         table_number = data['table_number']
         access_token = data.get('access_token')
@@ -228,9 +265,6 @@ def create_order():
                 db.session.add(table)
                 db.session.flush()
 
-        if not data['items'] or not isinstance(data['items'], list):
-            return error_response('Items are required', 400)
-
         # Create order with internal order ID (UUID)
         order = Order(
             internal_order_id=OrderNumberService.generate_internal_order_id(),
@@ -248,29 +282,28 @@ def create_order():
             # Fallback to legacy method if allocation fails
             order.generate_order_number()
 
-        order_items_count = 0
-        for item_data in data['items']:
-            menu_item = MenuItem.query.get(item_data.get('menu_item_id'))
-            if not menu_item or not menu_item.is_available:
-                continue
-            quantity = item_data.get('quantity', 1)
-            order_item = OrderItem(
-                menu_item_id=menu_item.id,
-                quantity=quantity,
-                unit_price=menu_item.price,
-                subtotal=menu_item.price * quantity,
-                notes=item_data.get('notes'),
-                order_id=order.id
-            )
-            db.session.add(order_item)
-            order_items_count += 1
-
-        if order_items_count == 0:
-            return error_response('No valid items in order', 400)
-
-        db.session.flush()
+        # Availability filtering, pricing and insertion happen in a single
+        # INSERT ... SELECT joined against a VALUES list of the requested
+        # (menu_item_id, quantity, notes) rows. Rendered as a CTE: SQLite has no
+        # VALUES derived table with column aliases
+        requested = values(
+            column('mid', Integer), column('qty', Integer), column('notes', Text), name='requested'
+        ).data(requested_rows).cte('requested')
+        db.session.execute(insert(OrderItem).from_select(
+            ['order_id', 'menu_item_id', 'quantity', 'unit_price', 'subtotal', 'notes'],
+            select(
+                literal(order.id), MenuItem.id, requested.c.qty, MenuItem.price,
+                MenuItem.price * requested.c.qty, requested.c.notes
+            ).join(Category, Category.id == MenuItem.category_id).join(
+                requested, requested.c.mid == MenuItem.id
+            ).where(*orderable_items)
+        ))
+
+        # Load the inserted items for the total
+        db.session.expire(order, ['items'])
         order.calculate_total()
         db.session.commit()
+        notify_new_order(order.restaurant_id, {'restaurant_id': order.restaurant_id})
 
         return json_response(order.to_dict(), 'Order placed successfully', 201)
     except Exception as e:
@@ -2,55 +2,211 @@
 Restaurant Owner Routes - Completely separate from admin system
 URL Pattern: /<restaurant_id>/* for each restaurant
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, g, jsonify, current_app
-from functools import wraps
+from flask import Blueprint, abort, render_template, request, redirect, url_for, flash, session, g, jsonify, current_app, send_file
+from functools import lru_cache, wraps
+from itertools import groupby
+from operator import itemgetter
+from time import monotonic
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+import hashlib
+import json
+import orjson
+import os
+import shutil
+import traceback
+import uuid
 from app import db
 from app.models import User, Restaurant, Order, OrderItem, Category, Table, MenuItem
-from app.services.qr_service import generate_restaurant_qr_code
+from app.services.qr_service import generate_restaurant_qr_code, restaurant_qr_filename
 from app.services.onboarding_service import OnboardingService
-from datetime import datetime, timedelta
+from app.services.realtime_service import notify_order_update, orders_changed
+from app.utils import csv_upload_reader
+from sqlalchemy import func, case, select, bindparam, insert, text, update
+from sqlalchemy.orm import contains_eager, load_only, raiseload, selectinload
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, time, timedelta
 
 owner_bp = Blueprint('owner', __name__)
 
-
-def get_current_owner():
-    """Get the current logged in restaurant owner or admin viewing as owner"""
-    # Check if admin is accessing with admin_access flag
-    if request.args.get('admin_access') == 'true' and session.get('admin_logged_in'):
-        admin_user = User.query.get(session.get('admin_user_id'))
-        if admin_user and admin_user.role in ['admin', 'superadmin', 'system_admin']:
-            # Get restaurant from URL parameter
-            restaurant_id = request.args.get('restaurant_id') or request.view_args.get('restaurant_id')
-            if restaurant_id:
-                restaurant = Restaurant.query.get(restaurant_id)
-                if restaurant and restaurant.owner:
-                    # Return the restaurant owner for this session
-                    return restaurant.owner
-
-    # Check for admin viewing kitchen screen
-    if request.args.get('admin_restaurant_id') and session.get('admin_logged_in'):
-        admin_user = User.query.get(session.get('admin_user_id'))
-        if admin_user and admin_user.role in ['admin', 'superadmin', 'system_admin']:
-            restaurant_id = request.args.get('admin_restaurant_id')
-            restaurant = Restaurant.query.get(restaurant_id)
-            if restaurant and restaurant.owner:
-                return restaurant.owner
-
-    # Normal owner login check
-    if session.get('owner_logged_in') and session.get('owner_user_id'):
-        user = User.query.get(session.get('owner_user_id'))
-        if user and user.role == 'restaurant_owner' and user.is_active:
-            return user
-    return None
+_MISSING = object()
+
+# Same hashing method as User.set_password, used to equalize login timing
+_DUMMY_PASSWORD_HASH = generate_password_hash('dummy-password', method='pbkdf2:sha256')
+
+UPLOAD_FOLDER = 'app/static/uploads/menu_images'
+_HASH_CHUNK_SIZE = 64 * 1024
+_UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+_IMPORT_BATCH_SIZE = 1000
+_ALLOWED_LOGO_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
+# JPEG, PNG, GIF (WebP is checked separately as RIFF....WEBP)
+_IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG\r\n\x1a\n', b'GIF8')
+
+_VALID_ORDER_STATUSES = frozenset({'pending', 'preparing', 'ready', 'completed', 'cancelled'})
+_CLOSED_ORDER_STATUSES = frozenset({'completed', 'cancelled'})
+# In-progress statuses shown on the customer screen, in the order its columns appear
+_ACTIVE_ORDER_STATUSES = ('pending', 'preparing', 'ready')
+
+_OWNER_SESSION_KEYS = ('owner_logged_in', 'owner_user_id')
+
+_ORDERS_PAGE_SIZE = 25
+
+# Profile form choices
+_RESTAURANT_CATEGORIES = (
+    'Fast Food', 'Fine Dining', 'Casual Dining', 'Cafe', 'Bakery',
+    'Bar & Grill', 'Pizzeria', 'Seafood', 'Steakhouse', 'Asian',
+    'Indian', 'Mexican', 'Italian', 'Japanese', 'Chinese',
+    'Thai', 'Vietnamese', 'Mediterranean', 'Middle Eastern', 'American',
+    'Vegetarian', 'Vegan', 'Food Truck', 'Buffet', 'Other'
+)
+_CURRENCIES = (
+    {'symbol': '$', 'name': 'US Dollar (USD)'},
+    {'symbol': '€', 'name': 'Euro (EUR)'},
+    {'symbol': '£', 'name': 'British Pound (GBP)'},
+    {'symbol': '¥', 'name': 'Japanese Yen (JPY)'},
+    {'symbol': '₹', 'name': 'Indian Rupee (INR)'},
+    {'symbol': '৳', 'name': 'Bangladeshi Taka (BDT)'},
+    {'symbol': 'A$', 'name': 'Australian Dollar (AUD)'},
+    {'symbol': 'C$', 'name': 'Canadian Dollar (CAD)'},
+    {'symbol': 'RM', 'name': 'Malaysian Ringgit (MYR)'},
+    {'symbol': 'S$', 'name': 'Singapore Dollar (SGD)'},
+    {'symbol': '₱', 'name': 'Philippine Peso (PHP)'},
+    {'symbol': '฿', 'name': 'Thai Baht (THB)'},
+    {'symbol': 'R', 'name': 'South African Rand (ZAR)'},
+    {'symbol': 'AED', 'name': 'UAE Dirham (AED)'},
+    {'symbol': 'SAR', 'name': 'Saudi Riyal (SAR)'},
+)
+
+# Rendered HTML of pages with no per-visitor content (owner login): template_name -> html
+_static_page_cache = {}
+
+# Per-process micro-cache of the customer screen poll:
+# (restaurant_id, format) -> (expires_at, payload, etag, mimetype)
+_ORDERS_STATUS_TTL = 3
+_ORDERS_STATUS_FORMATS = ('json', 'toon')
+# Per-order fields of the customer screen payload, and their positions in _active_orders_stmt rows
+_SCREEN_ORDER_FIELDS = ('id', 'order_number', 'table_number')
+_screen_order_values = itemgetter(1, 2, 3)
+_orders_status_cache = {}
+
+# Built once at import; SQLAlchemy caches the compiled SQL for reuse on every request.
+# The restaurant is joined in since nearly every owner view reads user.restaurant.
+_user_role_stmt = select(User.role).where(User.id == bindparam('uid'))
+_owner_by_restaurant_stmt = select(User).join(User.restaurant).options(
+    contains_eager(User.restaurant)
+).where(Restaurant.id == bindparam('rid'))
+_owner_by_username_stmt = select(User).where(
+    User.username == bindparam('username'), User.role == 'restaurant_owner'
+)
+_restaurant_order_stmt = select(Order).where(
+    Order.id == bindparam('order_id'), Order.restaurant_id == bindparam('rid')
+)
+_restaurant_menu_item_stmt = select(MenuItem).join(Category, Category.id == MenuItem.category_id).where(
+    MenuItem.id == bindparam('item_id'), Category.restaurant_id == bindparam('rid')
+)
+# Customer screen rows, grouped by status in (restaurant_id, status, created_at) index order
+_active_orders_stmt = select(
+    Order.status, Order.id, Order.order_number, Order.table_number
+).where(
+    Order.restaurant_id == bindparam('rid'),
+    Order.status.in_(bindparam('statuses', expanding=True))
+).order_by(Order.status, Order.created_at.asc()).execution_options(yield_per=500)
+# PostgreSQL only: the same rows, already in the {status: [{...}]} shape the
+# customer screen expects, built by the database as one JSON text value
+_active_orders_json_stmt = text("""
+    SELECT json_build_object(
+        'pending', coalesce(json_agg(entry ORDER BY created_at) FILTER (WHERE status = 'pending'), '[]'),
+        'preparing', coalesce(json_agg(entry ORDER BY created_at) FILTER (WHERE status = 'preparing'), '[]'),
+        'ready', coalesce(json_agg(entry ORDER BY created_at) FILTER (WHERE status = 'ready'), '[]')
+    )::text
+    FROM (
+        SELECT status, created_at,
+               json_build_object('id', id, 'order_number', order_number, 'table_number', table_number) AS entry
+        FROM orders
+        WHERE restaurant_id = :rid AND status IN ('pending', 'preparing', 'ready')
+    ) AS active
+""")
+
+
+@owner_bp.record_once
+def _create_upload_folder(state):
+    """Create the menu image and logo folders once, when the blueprint is registered"""
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(os.path.join(state.app.root_path, 'static', 'uploads', 'logos'), exist_ok=True)
+
+
+@owner_bp.errorhandler(RequestEntityTooLarge)
+def _upload_too_large(error):
+    """Send an oversized upload back to the form it came from instead of a bare 413"""
+    if _is_ajax_request():
+        return jsonify({'success': False, 'message': 'File is too large'}), 413
+    limit_mb = current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    flash(f'File is too large. The maximum upload size is {limit_mb} MB.', 'error')
+    return redirect(request.referrer or url_for('owner.profile'))
+
+
+def _allowed_logo_file(filename):
+    """Check a logo upload's extension against the allowed image types"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in _ALLOWED_LOGO_EXTENSIONS
+
+
+def _is_image_header(header):
+    """Check the leading bytes of an upload against known image signatures"""
+    return header.startswith(_IMAGE_SIGNATURES) or (header[:4] == b'RIFF' and header[8:12] == b'WEBP')
+
+
+def _save_uploaded_image(file):
+    """Save an uploaded menu image and return its URL, or None if no file was sent.
+
+    Raises ValueError if the upload is not a JPEG, PNG, GIF or WebP image.
+    """
+    if not file or not file.filename:
+        return None
+
+    header = file.stream.read(12)
+    file.stream.seek(0)
+    if not _is_image_header(header):
+        raise ValueError('Invalid image file. Please upload a JPG, PNG, GIF or WebP image.')
+
+    # Name the file after its content so re-uploading the same image reuses it
+    unique_filename = f"{_upload_digest(file)}_{secure_filename(file.filename)}"
+    target_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+    if not os.path.exists(target_path):
+        _write_upload(file, target_path)
+    return f'/static/uploads/menu_images/{unique_filename}'
+
+
+def _upload_digest(file):
+    """Short BLAKE2b hex digest of an upload's content, leaving the stream rewound"""
+    digest = hashlib.blake2b(digest_size=8)
+    for chunk in iter(lambda: file.stream.read(_HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file.stream.seek(0)
+    return digest.hexdigest()
+
+
+def _write_upload(file, path):
+    """Copy an uploaded file to disk with a 1 MB buffer (FileStorage.save uses 16 KB)"""
+    with open(path, 'wb') as out:
+        shutil.copyfileobj(file.stream, out, _UPLOAD_COPY_BUFFER_SIZE)
 
 
 def is_admin_accessing():
-    """Check if current request is from admin accessing owner features"""
-    return (request.args.get('admin_access') == 'true' or request.args.get('admin_restaurant_id')) and session.get('admin_logged_in')
+    """Check if current request is from admin accessing owner features, memoized on flask.g"""
+    admin_accessing = getattr(g, '_admin_accessing', None)
+    if admin_accessing is None:
+        admin_accessing = g._admin_accessing = bool(
+            (request.args.get('admin_access') == 'true' or request.args.get('admin_restaurant_id'))
+            and session.get('admin_logged_in')
+        )
+    return admin_accessing
 
 
 def feature_required(feature_name):
     """Decorator to check if restaurant has access to a specific feature based on pricing plan and onboarding status"""
+    # Fixed per decorated view, so format it once at import rather than on every denial
+    feature_display_name = feature_name.replace('_', ' ').title()
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -69,7 +225,7 @@ def feature_required(feature_name):
             if not is_accessible:
                 # If admin is accessing, redirect back with message
                 if is_admin_accessing():
-                    flash(f'This feature ({feature_name.replace("_", " ").title()}) requires onboarding to be complete.', 'warning')
+                    flash(f'This feature ({feature_display_name}) requires onboarding to be complete.', 'warning')
                     return redirect(url_for('admin.restaurant_detail', restaurant_id=user.restaurant.id))
 
                 # For owners, show onboarding or locked message
@@ -81,7 +237,7 @@ def feature_required(feature_name):
                     user=user,
                     restaurant=user.restaurant,
                     feature_name=feature_name,
-                    feature_display_name=feature_name.replace('_', ' ').title(),
+                    feature_display_name=feature_display_name,
                     lock_reason=lock_reason,
                     current_plan=user.restaurant.pricing_plan
                 )
@@ -90,7 +246,7 @@ def feature_required(feature_name):
             if not user.restaurant.has_feature(feature_name):
                 # If admin is accessing, redirect back with message
                 if is_admin_accessing():
-                    flash(f'This feature ({feature_name.replace("_", " ").title()}) is not enabled in this restaurant\'s plan. Please upgrade their plan first.', 'warning')
+                    flash(f'This feature ({feature_display_name}) is not enabled in this restaurant\'s plan. Please upgrade their plan first.', 'warning')
                     return redirect(url_for('admin.restaurant_detail', restaurant_id=user.restaurant.id))
 
                 # For owners, show upgrade page
@@ -98,7 +254,7 @@ def feature_required(feature_name):
                     user=user,
                     restaurant=user.restaurant,
                     feature_name=feature_name,
-                    feature_display_name=feature_name.replace('_', ' ').title(),
+                    feature_display_name=feature_display_name,
                     current_plan=user.restaurant.pricing_plan
                 )
 
@@ -107,52 +263,163 @@ def feature_required(feature_name):
     return decorator
 
 
+def _set_owner_session(user_id):
+    """Replace the session with a logged-in owner session"""
+    session.clear()
+    session.update({'owner_logged_in': True, 'owner_user_id': user_id})
+
+
+def _clear_owner_session():
+    """Drop the owner login keys, leaving any admin session intact"""
+    for key in _OWNER_SESSION_KEYS:
+        session.pop(key, None)
+
+
+def _render_static_page(template_name):
+    """Render a page whose HTML is the same for every visitor once, then reuse it.
+
+    Pending flash messages are the only per-request content these pages show,
+    so render normally when there are any, and always in debug mode so
+    template edits show up.
+    """
+    if current_app.debug or session.get('_flashes'):
+        return render_template(template_name)
+    html = _static_page_cache.get(template_name)
+    if html is None:
+        html = _static_page_cache[template_name] = render_template(template_name)
+    return html
+
+
+def _next_category_sort_order_stmt(restaurant_id):
+    """Sort position after the restaurant's last category (MAX, not COUNT, so deletes leave no duplicates)"""
+    return select(
+        func.coalesce(func.max(Category.sort_order), 0) + 1
+    ).where(Category.restaurant_id == restaurant_id)
+
+
+def _next_category_sort_order(restaurant_id):
+    """Run _next_category_sort_order_stmt and return the position"""
+    return db.session.scalar(_next_category_sort_order_stmt(restaurant_id))
+
+
+def _request_now():
+    """UTC time of the current request, read once and memoized on flask.g"""
+    now = getattr(g, '_request_now', None)
+    if now is None:
+        now = g._request_now = datetime.utcnow()
+    return now
+
+
 def get_current_owner():
+    """Get the current owner, memoized on flask.g for the lifetime of the request"""
+    user = getattr(g, '_owner_user', _MISSING)
+    if user is _MISSING:
+        user = g._owner_user = _load_current_owner()
+    return user
+
+
+def _load_current_owner():
     """Get the current logged in restaurant owner or admin viewing as owner"""
     # Check if admin is accessing with admin_access flag
-    if request.args.get('admin_access') == 'true' and session.get('admin_logged_in'):
-        admin_user = User.query.get(session.get('admin_user_id'))
-        if admin_user and admin_user.role in ['admin', 'superadmin', 'system_admin']:
-            # Get restaurant from URL parameter
-            restaurant_id = request.args.get('restaurant_id') or request.view_args.get('restaurant_id')
-            if restaurant_id:
-                restaurant = Restaurant.query.get(restaurant_id)
-                if restaurant and restaurant.owner:
-                    # Return the restaurant owner for this session
-                    return restaurant.owner
+    if request.args.get('admin_access') == 'true' and _is_admin_session():
+        # Get restaurant from URL parameter
+        restaurant_id = request.args.get('restaurant_id') or request.view_args.get('restaurant_id')
+        if restaurant_id:
+            owner = _load_restaurant_owner(restaurant_id)
+            if owner:
+                # Return the restaurant owner for this session
+                return owner
 
     # Check for admin viewing kitchen screen
-    if request.args.get('admin_restaurant_id') and session.get('admin_logged_in'):
-        admin_user = User.query.get(session.get('admin_user_id'))
-        if admin_user and admin_user.role in ['admin', 'superadmin', 'system_admin']:
-            restaurant_id = request.args.get('admin_restaurant_id')
-            restaurant = Restaurant.query.get(restaurant_id)
-            if restaurant and restaurant.owner:
-                return restaurant.owner
+    if request.args.get('admin_restaurant_id') and _is_admin_session():
+        owner = _load_restaurant_owner(request.args.get('admin_restaurant_id'))
+        if owner:
+            return owner
 
     # Normal owner login check
     if session.get('owner_logged_in') and session.get('owner_user_id'):
-        user = User.query.get(session.get('owner_user_id'))
+        user = User.get_with_restaurant(session['owner_user_id'])
         if user and user.role == 'restaurant_owner' and user.is_active:
             return user
     return None
 
 
+def _is_admin_session():
+    """Check that the session belongs to a platform admin, reading only the role column"""
+    if not session.get('admin_logged_in'):
+        return False
+    role = db.session.execute(_user_role_stmt, {'uid': session.get('admin_user_id')}).scalar()
+    return role in ('admin', 'superadmin', 'system_admin')
+
+
+def _load_restaurant_owner(restaurant_id):
+    """Load a restaurant's owner together with the restaurant in one query"""
+    return db.session.execute(
+        _owner_by_restaurant_stmt, {'rid': restaurant_id}
+    ).scalar_one_or_none()
+
+
+def _load_opts(*eager):
+    """Eager-load options for a query, plus raiseload('*') when SQLALCHEMY_RAISELOAD is on.
+
+    With the flag set (development/tests), any relationship the query did not
+    eager-load raises instead of quietly issuing one SELECT per row.
+    """
+    if current_app.config.get('SQLALCHEMY_RAISELOAD'):
+        return (*eager, raiseload('*', sql_only=True))
+    return eager
+
+
+def _poll_bind(fresh=False):
+    """Engine for the customer screen poll: the replica when configured, else the primary.
+
+    Fresh reads (a refetch right after a pushed order change) always go to the
+    primary, since a lagging replica may not have the change yet.
+    """
+    return {'bind': db.engine if fresh else db.engines.get('replica') or db.engine}
+
+
+def _wants_fresh_read():
+    """Check whether the client asked to bypass caches (fetch with cache: 'no-cache' or a reload)"""
+    cache_control = request.cache_control
+    return bool(cache_control.no_cache) or cache_control.max_age == 0 or 'no-cache' in request.pragma
+
+
+def _get_restaurant_order(order_id, restaurant_id):
+    """Fetch an order by id, only if it belongs to the given restaurant"""
+    return db.session.execute(
+        _restaurant_order_stmt, {'order_id': order_id, 'rid': restaurant_id}
+    ).scalar_one_or_none()
+
+
+def _get_restaurant_menu_item(item_id, restaurant_id):
+    """Fetch a menu item by id, only if its category belongs to the given restaurant"""
+    return db.session.execute(
+        _restaurant_menu_item_stmt, {'item_id': item_id, 'rid': restaurant_id}
+    ).scalar_one_or_none()
+
+
+def _is_ajax_request():
+    """Check if this is an AJAX/API request, cheapest checks first.
+
+    Only called when building an error response, so allowed requests
+    never parse the Accept header.
+    """
+    return '/api/' in request.path or \
+        request.headers.get('X-Requested-With') == 'XMLHttpRequest' or \
+        request.content_type == 'application/json' or \
+        request.accept_mimetypes.best == 'application/json'
+
+
 def owner_required(f):
     """Decorator for owner-only routes - allows admin access"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Check if this is an AJAX/API request
-        is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest' or \
-                  request.content_type == 'application/json' or \
-                  request.accept_mimetypes.best == 'application/json' or \
-                  '/api/' in request.path
-
         # Check for admin access
-        is_admin_access = (request.args.get('admin_access') == 'true' or request.args.get('admin_restaurant_id')) and session.get('admin_logged_in')
+        is_admin_access = is_admin_accessing()
 
         if not session.get('owner_logged_in') and not is_admin_access:
-            if is_ajax:
+            if _is_ajax_request():
                 return jsonify({'success': False, 'message': 'Please login to access your restaurant'}), 401
             flash('Please login to access your restaurant', 'info')
             return redirect(url_for('owner.login'))
@@ -160,17 +427,19 @@ def owner_required(f):
         user = get_current_owner()
         if not user:
             if not is_admin_access:
-                session.pop('owner_logged_in', None)
-                session.pop('owner_user_id', None)
-            if is_ajax:
+                _clear_owner_session()
+            if _is_ajax_request():
                 return jsonify({'success': False, 'message': 'Session expired. Please login again'}), 401
             flash('Session expired. Please login again', 'info')
             return redirect(url_for('owner.login'))
         g.owner = user
+        # Expose the owner's restaurant for views; it was loaded with the user
+        restaurant = g.restaurant = user.restaurant
+        g.restaurant_id = restaurant.id if restaurant else None
 
         # Check if restaurant has been rejected (unless admin is accessing)
-        if user.restaurant and not is_admin_access:
-            registration_status = getattr(user.restaurant, 'registration_status', 'approved')
+        if restaurant and not is_admin_access:
+            registration_status = getattr(restaurant, 'registration_status', 'approved')
 
             # If rejected, only allow access to the rejected page
             if registration_status == 'rejected':
@@ -185,14 +454,14 @@ def owner_required(f):
                 if request.endpoint not in allowed_endpoints:
                     flash('Your account is pending review. Some features are limited until approved.', 'warning')
 
-        # Verify restaurant ID if provided in URL
+        # Verify restaurant ID if provided in URL (routes use <int:restaurant_id>)
         restaurant_id = kwargs.get('restaurant_id')
-        if restaurant_id and user.restaurant:
-            if str(user.restaurant.id) != str(restaurant_id):
-                if is_ajax:
+        if restaurant_id and restaurant:
+            if g.restaurant_id != restaurant_id:
+                if _is_ajax_request():
                     return jsonify({'success': False, 'message': 'Access denied'}), 403
                 flash('Access denied. You can only access your own restaurant.', 'error')
-                return redirect(url_for('owner.dashboard', restaurant_id=user.restaurant.id))
+                return redirect(url_for('owner.dashboard', restaurant_id=g.restaurant_id))
 
         return f(*args, **kwargs)
     return decorated_function
@@ -218,17 +487,21 @@ def login():
             return render_template('admin/owner_login_new.html')
 
         # Only allow restaurant_owner role
-        user = User.query.filter_by(username=username, role='restaurant_owner').first()
-
-        if user and user.check_password(password):
+        user = db.session.execute(
+            _owner_by_username_stmt, {'username': username}
+        ).scalar_one_or_none()
+
+        if user is None:
+            # Spend the same hashing time as a real check so unknown usernames
+            # can't be told apart from wrong passwords by response time
+            check_password_hash(_DUMMY_PASSWORD_HASH, password)
+        elif user.check_password(password):
             if not user.is_active:
                 flash('Your account has been disabled. Please contact administrator.', 'error')
                 return render_template('admin/owner_login_new.html')
 
             # Clear any existing session and set owner session
-            session.clear()
-            session['owner_logged_in'] = True
-            session['owner_user_id'] = user.id
+            _set_owner_session(user.id)
 
             flash(f'Welcome back, {user.username}!', 'success')
 
@@ -250,14 +523,13 @@ def login():
 
         flash('Invalid username or password', 'error')
 
-    return render_template('admin/owner_login_new.html')
+    return _render_static_page('admin/owner_login_new.html')
 
 
 @owner_bp.route('/owner/logout')
 def logout():
     """Restaurant owner logout"""
-    session.pop('owner_logged_in', None)
-    session.pop('owner_user_id', None)
+    _clear_owner_session()
     flash('You have been logged out successfully', 'success')
     return redirect(url_for('owner.login'))
 
@@ -266,7 +538,7 @@ def logout():
 @owner_required
 def rejected():
     """Page shown when registration has been rejected"""
-    user = get_current_owner()
+    user = g.owner
     if not user or not user.restaurant:
         return redirect(url_for('owner.login'))
 
@@ -285,7 +557,7 @@ def rejected():
 @owner_required
 def pending_review():
     """Page shown when registration is pending review"""
-    user = get_current_owner()
+    user = g.owner
     if not user or not user.restaurant:
         return redirect(url_for('owner.login'))
 
@@ -299,6 +571,12 @@ def pending_review():
     )
 
 
+def _signup_error(message):
+    """Flash a signup error and send the user back to the signup form"""
+    flash(message, 'error')
+    return redirect(url_for('owner.login', signup=1))
+
+
 @owner_bp.route('/owner/signup', methods=['POST'])
 def signup():
     """Restaurant owner signup with package selection"""
@@ -314,31 +592,24 @@ def signup():
 
         # Validation
         if not all([username, email, password, restaurant_name, owner_name, pricing_plan_id]):
-            flash('Please fill in all required fields and select a pricing plan', 'error')
-            return redirect(url_for('owner.login') + '?signup=1')
+            return _signup_error('Please fill in all required fields and select a pricing plan')
 
         if len(password) < 6:
-            flash('Password must be at least 6 characters long', 'error')
-            return redirect(url_for('owner.login') + '?signup=1')
-
-        # Check if username exists
-        if User.query.filter_by(username=username).first():
-            flash('Username already exists. Please choose another one.', 'error')
-            return redirect(url_for('owner.login') + '?signup=1')
+            return _signup_error('Password must be at least 6 characters long')
 
-        # Check if email exists
-        if User.query.filter_by(email=email).first():
-            flash('Email already registered. Please use another email.', 'error')
-            return redirect(url_for('owner.login') + '?signup=1')
+        # Check if username or email exists
+        taken = User.find_taken_field(username, email)
+        if taken == 'username':
+            return _signup_error('Username already exists. Please choose another one.')
+        if taken == 'email':
+            return _signup_error('Email already registered. Please use another email.')
 
         # Get the selected pricing plan
         from app.models.website_content_models import PricingPlan, Subscription
-        from datetime import datetime, timedelta
 
-        selected_plan = PricingPlan.query.get(int(pricing_plan_id))
+        selected_plan = db.session.get(PricingPlan, int(pricing_plan_id))
         if not selected_plan or not selected_plan.is_active:
-            flash('Invalid pricing plan selected.', 'error')
-            return redirect(url_for('owner.login') + '?signup=1')
+            return _signup_error('Invalid pricing plan selected.')
 
         # Create new user
         new_user = User(
@@ -420,9 +691,7 @@ def signup():
             current_app.logger.error(f"Failed to initialize onboarding: {e}")
 
         # Auto-login the user
-        session.clear()
-        session['owner_logged_in'] = True
-        session['owner_user_id'] = new_user.id
+        _set_owner_session(new_user.id)
 
         flash(success_message, 'success')
 
@@ -431,8 +700,7 @@ def signup():
 
     except Exception as e:
         db.session.rollback()
-        flash(f'An error occurred during registration: {str(e)}', 'error')
-        return redirect(url_for('owner.login') + '?signup=1')
+        return _signup_error(f'An error occurred during registration: {str(e)}')
 
 
 @owner_bp.route('/owner/forgot-password', methods=['GET', 'POST'])
@@ -457,7 +725,7 @@ def forgot_password():
 @owner_required
 def no_restaurant():
     """Show message when owner has no restaurant assigned"""
-    user = get_current_owner()
+    user = g.owner
     return render_template('owner/no_restaurant.html', user=user)
 
 
@@ -465,7 +733,7 @@ def no_restaurant():
 @owner_required
 def dashboard(restaurant_id):
     """Restaurant owner dashboard - view only their own restaurant"""
-    user = get_current_owner()
+    user = g.owner
 
     # Check if user has a restaurant
     if not user.restaurant:
@@ -478,7 +746,7 @@ def dashboard(restaurant_id):
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
-    today = datetime.utcnow().date()
+    today = _request_now().date()
 
     # Calculate date range based on filter
     if filter_type == 'today':
@@ -501,62 +769,99 @@ def dashboard(restaurant_id):
         start_date = today
         end_date = today
 
-    # Get filtered orders
-    filtered_orders = Order.query.filter(
+    # Half-open datetime bounds keep the created_at index usable (date() would not)
+    period_start = datetime.combine(start_date, time.min)
+    period_end = datetime.combine(end_date + timedelta(days=1), time.min)
+    today_start = datetime.combine(today, time.min)
+
+    in_period = (
         Order.restaurant_id == restaurant.id,
-        db.func.date(Order.created_at) >= start_date,
-        db.func.date(Order.created_at) <= end_date
-    ).all()
+        Order.created_at >= period_start,
+        Order.created_at < period_end
+    )
 
-    # Calculate statistics for the filtered period
-    filtered_order_count = len(filtered_orders)
-    filtered_revenue = sum(order.total_price for order in filtered_orders)
-    filtered_completed = len([o for o in filtered_orders if o.status == 'completed'])
-    filtered_pending = len([o for o in filtered_orders if o.status == 'pending'])
-    filtered_preparing = len([o for o in filtered_orders if o.status == 'preparing'])
-    filtered_cancelled = len([o for o in filtered_orders if o.status == 'cancelled'])
+    # Period statistics and overall restaurant statistics come from one
+    # aggregate over the restaurant's orders, each column a conditional sum
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    def revenue_where(condition):
+        return func.coalesce(func.sum(case((condition, Order.total_price), else_=0)), 0)
+
+    in_range = db.and_(Order.created_at >= period_start, Order.created_at < period_end)
+    is_today = Order.created_at >= today_start
+    (
+        filtered_order_count, filtered_revenue, filtered_completed, filtered_pending,
+        filtered_preparing, filtered_cancelled,
+        total_orders, pending_orders, today_orders, today_revenue
+    ) = db.session.query(
+        count_where(in_range),
+        revenue_where(in_range),
+        count_where(db.and_(in_range, Order.status == 'completed')),
+        count_where(db.and_(in_range, Order.status == 'pending')),
+        count_where(db.and_(in_range, Order.status == 'preparing')),
+        count_where(db.and_(in_range, Order.status == 'cancelled')),
+        func.count(Order.id),
+        count_where(Order.status == 'pending'),
+        count_where(is_today),
+        revenue_where(is_today)
+    ).filter(Order.restaurant_id == restaurant.id).one()
 
     # Calculate average order value
     avg_order_value = filtered_revenue / filtered_order_count if filtered_order_count > 0 else 0
 
     # Get top selling items for the period
-    item_sales = {}
-    for order in filtered_orders:
-        for item in order.items:
-            item_id = item.menu_item_id
-            if item_id not in item_sales:
-                item_sales[item_id] = {'name': item.menu_item.name if item.menu_item else 'Unknown', 'quantity': 0, 'revenue': 0}
-            item_sales[item_id]['quantity'] += item.quantity
-            item_sales[item_id]['revenue'] += item.subtotal
-
-    top_items = sorted(item_sales.values(), key=lambda x: x['quantity'], reverse=True)[:5]
-
-    # Get daily revenue data for chart (last 7 days or filtered period)
+    quantity_sold = func.sum(OrderItem.quantity)
+    top_items = [
+        {'name': name or 'Unknown', 'quantity': quantity, 'revenue': revenue}
+        for name, quantity, revenue in db.session.query(
+            MenuItem.name, quantity_sold, func.sum(OrderItem.subtotal)
+        ).join(Order, Order.id == OrderItem.order_id).outerjoin(
+            MenuItem, MenuItem.id == OrderItem.menu_item_id
+        ).filter(*in_period).group_by(
+            OrderItem.menu_item_id, MenuItem.name
+        ).order_by(quantity_sold.desc()).limit(5)
+    ]
+
+    # Get daily revenue data for chart (last 7 days or filtered period), one
+    # row per day with orders; date() is only in the GROUP BY, the range stays indexable
+    order_day = func.date(Order.created_at)
+    daily_totals = {
+        str(day): (revenue, count)
+        for day, revenue, count in db.session.query(
+            order_day, func.coalesce(func.sum(Order.total_price), 0), func.count(Order.id)
+        ).filter(*in_period).group_by(order_day)
+    }
+
     chart_days = min((end_date - start_date).days + 1, 30)
     daily_data = []
     for i in range(chart_days):
         day = end_date - timedelta(days=chart_days - 1 - i)
-        day_orders = [o for o in filtered_orders if o.created_at.date() == day]
-        day_revenue = sum(o.total_price for o in day_orders)
+        day_revenue, day_count = daily_totals.get(day.isoformat(), (0, 0))
         daily_data.append({
             'date': day.strftime('%b %d'),
             'revenue': round(day_revenue, 2),
-            'orders': len(day_orders)
+            'orders': day_count
         })
 
-    # Get overall restaurant statistics
-    total_orders = Order.query.filter_by(restaurant_id=restaurant.id).count()
-    pending_orders = Order.query.filter_by(restaurant_id=restaurant.id, status='pending').count()
-
-    # Get categories and menu items
-    categories = Category.query.filter_by(restaurant_id=restaurant.id).order_by(Category.sort_order).all()
-    total_items = sum(len(cat.items) for cat in categories)
-
-    # Get tables
-    tables = Table.query.filter_by(restaurant_id=restaurant.id).all()
-
-    # Get recent orders (last 10)
-    recent_orders = Order.query.filter_by(restaurant_id=restaurant.id).order_by(Order.created_at.desc()).limit(10).all()
+    # The dashboard only shows how many categories, menu items and tables there
+    # are, so count all three in one round-trip instead of loading the rows
+    category_count, total_items, table_count = db.session.query(
+        select(func.count(Category.id)).where(
+            Category.restaurant_id == restaurant.id
+        ).scalar_subquery(),
+        select(func.count(MenuItem.id)).join(Category, Category.id == MenuItem.category_id).where(
+            Category.restaurant_id == restaurant.id
+        ).scalar_subquery(),
+        select(func.count(Table.id)).where(
+            Table.restaurant_id == restaurant.id
+        ).scalar_subquery()
+    ).one()
+
+    # Get recent orders (last 10); the template shows each order's item count
+    recent_orders = Order.query.options(*_load_opts(selectinload(Order.items))).filter_by(
+        restaurant_id=restaurant.id
+    ).order_by(Order.created_at.desc()).limit(10).all()
 
     # Get subscription status
     from app.models.website_content_models import Subscription
@@ -597,11 +902,11 @@ def dashboard(restaurant_id):
         # Overall stats
         total_orders=total_orders,
         pending_orders=pending_orders,
-        today_orders=len([o for o in filtered_orders if o.created_at.date() == today]),
-        today_revenue=sum(o.total_price for o in filtered_orders if o.created_at.date() == today),
-        categories=categories,
+        today_orders=today_orders,
+        today_revenue=today_revenue,
+        category_count=category_count,
         total_items=total_items,
-        tables=tables,
+        table_count=table_count,
         recent_orders=recent_orders
     )
 
@@ -610,13 +915,23 @@ def dashboard(restaurant_id):
 @owner_required
 def generate_qr(restaurant_id):
     """Generate QR code for the restaurant"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant or user.restaurant.id != restaurant_id:
         flash('Access denied', 'error')
         return redirect(url_for('owner.login'))
 
     restaurant = user.restaurant
+
+    # The QR payload only depends on public_id (and BASE_URL), so an existing
+    # file for this restaurant is already current
+    expected_filename = restaurant_qr_filename(restaurant.public_id)
+    if restaurant.qr_code_path == expected_filename and os.path.exists(
+        os.path.join(current_app.config['QR_CODE_FOLDER'], expected_filename)
+    ):
+        flash('QR code is already up to date.', 'info')
+        return redirect(url_for('owner.dashboard', restaurant_id=restaurant_id))
+
     try:
         qr_filename = generate_restaurant_qr_code(restaurant.public_id, restaurant.name)
         restaurant.qr_code_path = qr_filename
@@ -632,7 +947,7 @@ def generate_qr(restaurant_id):
 @owner_required
 def order_invoice(order_number):
     """Generate invoice for an order"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('Restaurant not found', 'error')
@@ -658,7 +973,7 @@ def order_invoice(order_number):
 @owner_required
 def upload_logo():
     """Upload restaurant logo"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('Restaurant not found', 'error')
@@ -674,37 +989,33 @@ def upload_logo():
         return redirect(url_for('owner.profile'))
 
     if file:
-        from werkzeug.utils import secure_filename
-        import os
-
-        # Allowed extensions
-        ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-
-        def allowed_file(filename):
-            return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-        if not allowed_file(file.filename):
+        if not _allowed_logo_file(file.filename):
             flash('Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP', 'error')
             return redirect(url_for('owner.profile'))
 
-        # Create upload directory if not exists
+        # Created at blueprint registration
         upload_dir = os.path.join(current_app.root_path, 'static', 'uploads', 'logos')
-        os.makedirs(upload_dir, exist_ok=True)
 
-        # Delete old logo if exists
-        if user.restaurant.logo_path:
-            old_logo = os.path.join(upload_dir, user.restaurant.logo_path)
-            if os.path.exists(old_logo):
-                os.remove(old_logo)
+        # Name the logo after its content: re-uploading the current logo is a no-op,
+        # and a changed logo always gets a new URL, so browsers never see a stale one
+        extension = file.filename.rsplit('.', 1)[1].lower()
+        filename = f"restaurant_{user.restaurant.id}_{_upload_digest(file)}.{extension}"
+        old_filename = user.restaurant.logo_path
 
-        # Save new logo
-        filename = f"restaurant_{user.restaurant.id}_{secure_filename(file.filename)}"
-        file_path = os.path.join(upload_dir, filename)
-        file.save(file_path)
+        if filename != old_filename:
+            file_path = os.path.join(upload_dir, filename)
+            if not os.path.exists(file_path):
+                _write_upload(file, file_path)
 
-        # Update database
-        user.restaurant.logo_path = filename
-        db.session.commit()
+            # Update database
+            user.restaurant.logo_path = filename
+            db.session.commit()
+
+            # Delete old logo if exists
+            if old_filename:
+                old_logo = os.path.join(upload_dir, old_filename)
+                if os.path.exists(old_logo):
+                    os.remove(old_logo)
 
         flash('Logo uploaded successfully!', 'success')
 
@@ -715,14 +1026,13 @@ def upload_logo():
 @owner_required
 def delete_logo():
     """Delete restaurant logo"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('Restaurant not found', 'error')
         return redirect(url_for('owner.profile'))
 
     if user.restaurant.logo_path:
-        import os
         upload_dir = os.path.join(current_app.root_path, 'static', 'uploads', 'logos')
         logo_path = os.path.join(upload_dir, user.restaurant.logo_path)
 
@@ -743,48 +1053,92 @@ def delete_logo():
 @owner_required
 def orders():
     """View orders for owner's restaurant"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     status_filter = request.args.get('status')
-    query = Order.query.filter_by(restaurant_id=user.restaurant.id)
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
+    # Fetch only the columns the list renders; it shows each order's item count,
+    # so load just the item keys for the whole page in one query
+    query = Order.query.options(*_load_opts(
+        load_only(Order.id, Order.order_number, Order.table_number, Order.total_price,
+                  Order.status, Order.created_at),
+        selectinload(Order.items).load_only(OrderItem.id, OrderItem.order_id)
+    )).filter_by(restaurant_id=user.restaurant.id)
 
     if status_filter:
         query = query.filter_by(status=status_filter)
 
-    orders = query.order_by(Order.created_at.desc()).limit(50).all()
+    # Keyset pagination on (created_at, id): pages are addressed by the order
+    # they start after/before, so deep pages cost the same as the first one
+    if after:
+        cursor_created, cursor_id = _order_cursor(after, user.restaurant.id)
+        query = query.filter(db.or_(
+            Order.created_at > cursor_created,
+            db.and_(Order.created_at == cursor_created, Order.id > cursor_id)
+        )).order_by(Order.created_at.asc(), Order.id.asc())
+    else:
+        if before:
+            cursor_created, cursor_id = _order_cursor(before, user.restaurant.id)
+            query = query.filter(db.or_(
+                Order.created_at < cursor_created,
+                db.and_(Order.created_at == cursor_created, Order.id < cursor_id)
+            ))
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    # One extra row tells whether there is another page in the direction of travel
+    page_orders = query.limit(_ORDERS_PAGE_SIZE + 1).all()
+    has_more = len(page_orders) > _ORDERS_PAGE_SIZE
+    page_orders = page_orders[:_ORDERS_PAGE_SIZE]
+    if after:
+        page_orders.reverse()
+    has_newer = bool(before) or (bool(after) and has_more)
+    has_older = bool(after) or (not after and has_more)
 
     # Stats
-    all_orders = Order.query.filter_by(restaurant_id=user.restaurant.id).all()
+    status_counts = dict(db.session.query(Order.status, func.count(Order.id)).filter(
+        Order.restaurant_id == user.restaurant.id
+    ).group_by(Order.status).all())
     stats = {
-        'total': len(all_orders),
-        'pending': sum(1 for o in all_orders if o.status == 'pending'),
-        'preparing': sum(1 for o in all_orders if o.status == 'preparing'),
-        'completed': sum(1 for o in all_orders if o.status == 'completed'),
+        'total': sum(status_counts.values()),
+        'pending': status_counts.get('pending', 0),
+        'preparing': status_counts.get('preparing', 0),
+        'completed': status_counts.get('completed', 0),
     }
 
     return render_template('owner/orders.html',
         user=user,
         restaurant=user.restaurant,
-        orders=orders,
+        orders=page_orders,
+        newer_cursor=page_orders[0].id if has_newer and page_orders else None,
+        older_cursor=page_orders[-1].id if has_older and page_orders else None,
         stats=stats,
         current_status=status_filter
     )
 
 
+def _order_cursor(order_id, restaurant_id):
+    """(created_at, id) of a restaurant's order, as SQL expressions for a keyset comparison"""
+    created_at = select(Order.created_at).where(
+        Order.id == order_id, Order.restaurant_id == restaurant_id
+    ).scalar_subquery()
+    return created_at, order_id
+
+
 @owner_bp.route('/orders/<int:order_id>/update-status', methods=['POST'])
 @owner_required
 def update_order_status(order_id):
     """Update order status"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     # Verify order belongs to this restaurant
-    order = Order.query.filter_by(id=order_id, restaurant_id=user.restaurant.id).first()
+    order = _get_restaurant_order(order_id, user.restaurant.id)
 
     if not order:
         flash('Order not found', 'error')
@@ -792,7 +1146,7 @@ def update_order_status(order_id):
 
     new_status = request.form.get('status')
 
-    if new_status not in ['pending', 'preparing', 'ready', 'completed', 'cancelled']:
+    if new_status not in _VALID_ORDER_STATUSES:
         flash('Invalid status', 'error')
         return redirect(url_for('owner.orders'))
 
@@ -800,10 +1154,11 @@ def update_order_status(order_id):
     order.status = new_status
 
     # Release display number if order is completed or cancelled
-    if new_status in ['completed', 'cancelled'] and old_status not in ['completed', 'cancelled']:
+    if new_status in _CLOSED_ORDER_STATUSES and old_status not in _CLOSED_ORDER_STATUSES:
         order.release_display_number()
 
     db.session.commit()
+    _orders_status_changed(order.restaurant_id)
 
     # Use display_order_number if available, otherwise fallback to order_number
     display_num = order.display_number_formatted if order.display_order_number else order.order_number
@@ -815,16 +1170,18 @@ def update_order_status(order_id):
 @owner_required
 def menu():
     """View and manage menu for owner's restaurant"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
-    categories = Category.query.filter_by(restaurant_id=user.restaurant.id).order_by(Category.sort_order).all()
+    categories = Category.query.options(*_load_opts(selectinload(Category.items))).filter_by(
+        restaurant_id=user.restaurant.id
+    ).order_by(Category.sort_order).all()
 
-    # Calculate total items and available items
+    # Calculate total items and available items from the already-loaded items (no extra query)
     total_items = sum(len(cat.items) for cat in categories)
-    available_items = sum(len([item for item in cat.items if item.is_available]) for cat in categories)
+    available_items = sum(1 for cat in categories for item in cat.items if item.is_available)
 
     return render_template('owner/menu.html',
         user=user,
@@ -839,7 +1196,7 @@ def menu():
 @owner_required
 def add_category():
     """Add new category"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -856,7 +1213,8 @@ def add_category():
         name=name,
         description=description,
         restaurant_id=user.restaurant.id,
-        sort_order=sort_order or Category.query.filter_by(restaurant_id=user.restaurant.id).count() + 1
+        # Computed inside the INSERT itself: no separate SELECT, no race between two adds
+        sort_order=sort_order or _next_category_sort_order_stmt(user.restaurant.id).scalar_subquery()
     )
 
     db.session.add(category)
@@ -870,7 +1228,7 @@ def add_category():
 @owner_required
 def edit_category(category_id):
     """Edit category"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -893,19 +1251,20 @@ def edit_category(category_id):
 @owner_required
 def delete_category(category_id):
     """Delete category and all its items"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
-    category = Category.query.filter_by(id=category_id, restaurant_id=user.restaurant.id).first()
-    if not category:
+    owned = db.session.query(Category.id).filter_by(id=category_id, restaurant_id=user.restaurant.id).scalar()
+    if not owned:
         flash('Category not found', 'error')
         return redirect(url_for('owner.menu'))
 
-    # Delete all items in category first
-    MenuItem.query.filter_by(category_id=category.id).delete()
-    db.session.delete(category)
+    # Delete all items in category first, then the category itself, as two bulk
+    # DELETEs; going through the ORM would SELECT the items just to cascade
+    MenuItem.query.filter_by(category_id=category_id).delete(synchronize_session=False)
+    Category.query.filter_by(id=category_id).delete(synchronize_session=False)
     db.session.commit()
 
     flash('Category deleted successfully', 'success')
@@ -916,7 +1275,7 @@ def delete_category(category_id):
 @owner_required
 def add_menu_item():
     """Add new menu item"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -943,19 +1302,11 @@ def add_menu_item():
         return redirect(url_for('owner.menu'))
 
     # Handle image upload
-    image_url = None
-    if 'image' in request.files:
-        file = request.files['image']
-        if file and file.filename:
-            from werkzeug.utils import secure_filename
-            import uuid
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex[:8]}_{filename}"
-            upload_folder = 'app/static/uploads/menu_images'
-            import os
-            os.makedirs(upload_folder, exist_ok=True)
-            file.save(os.path.join(upload_folder, unique_filename))
-            image_url = f'/static/uploads/menu_images/{unique_filename}'
+    try:
+        image_url = _save_uploaded_image(request.files.get('image'))
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('owner.menu'))
 
     menu_item = MenuItem(
         name=name,
@@ -977,16 +1328,13 @@ def add_menu_item():
 @owner_required
 def edit_menu_item(item_id):
     """Edit menu item"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     # Verify item belongs to this restaurant
-    item = MenuItem.query.join(Category).filter(
-        MenuItem.id == item_id,
-        Category.restaurant_id == user.restaurant.id
-    ).first()
+    item = _get_restaurant_menu_item(item_id, user.restaurant.id)
 
     if not item:
         flash('Menu item not found', 'error')
@@ -1019,18 +1367,13 @@ def edit_menu_item(item_id):
     item.category_id = category_id
 
     # Handle image upload
-    if 'image' in request.files:
-        file = request.files['image']
-        if file and file.filename:
-            from werkzeug.utils import secure_filename
-            import uuid
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex[:8]}_{filename}"
-            upload_folder = 'app/static/uploads/menu_images'
-            import os
-            os.makedirs(upload_folder, exist_ok=True)
-            file.save(os.path.join(upload_folder, unique_filename))
-            item.image_url = f'/static/uploads/menu_images/{unique_filename}'
+    try:
+        image_url = _save_uploaded_image(request.files.get('image'))
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('owner.menu'))
+    if image_url:
+        item.image_url = image_url
 
     db.session.commit()
 
@@ -1042,16 +1385,13 @@ def edit_menu_item(item_id):
 @owner_required
 def toggle_menu_item(item_id):
     """Toggle menu item availability"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     # Verify item belongs to this restaurant
-    item = MenuItem.query.join(Category).filter(
-        MenuItem.id == item_id,
-        Category.restaurant_id == user.restaurant.id
-    ).first()
+    item = _get_restaurant_menu_item(item_id, user.restaurant.id)
 
     if not item:
         flash('Menu item not found', 'error')
@@ -1069,16 +1409,13 @@ def toggle_menu_item(item_id):
 @owner_required
 def delete_menu_item(item_id):
     """Delete menu item"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     # Verify item belongs to this restaurant
-    item = MenuItem.query.join(Category).filter(
-        MenuItem.id == item_id,
-        Category.restaurant_id == user.restaurant.id
-    ).first()
+    item = _get_restaurant_menu_item(item_id, user.restaurant.id)
 
     if not item:
         flash('Menu item not found', 'error')
@@ -1095,7 +1432,7 @@ def delete_menu_item(item_id):
 @owner_required
 def import_menu_csv():
     """Import menu items from CSV file"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -1111,14 +1448,19 @@ def import_menu_csv():
         return redirect(url_for('owner.menu'))
 
     try:
-        import csv
-        import io
-
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-
-        added_count = 0
+        csv_reader = csv_upload_reader(file)
+
+        # Resolve categories from memory instead of querying once per row;
+        # only names and ids are needed, not Category objects
+        category_ids = dict(db.session.query(Category.name, Category.id).filter(
+            Category.restaurant_id == user.restaurant.id
+        ).all())
+        next_sort_order = _next_category_sort_order(user.restaurant.id)
+
+        # Parse everything first; new categories and items are then inserted
+        # with one executemany INSERT each instead of per-row ORM objects
+        new_categories = []
+        parsed_rows = []
         error_count = 0
 
         for row in csv_reader:
@@ -1128,19 +1470,14 @@ def import_menu_csv():
                 if not category_name:
                     continue
 
-                category = Category.query.filter_by(
-                    name=category_name,
-                    restaurant_id=user.restaurant.id
-                ).first()
-
-                if not category:
-                    category = Category(
-                        name=category_name,
-                        restaurant_id=user.restaurant.id,
-                        sort_order=Category.query.filter_by(restaurant_id=user.restaurant.id).count() + 1
-                    )
-                    db.session.add(category)
-                    db.session.flush()
+                if category_name not in category_ids:
+                    new_categories.append({
+                        'name': category_name,
+                        'restaurant_id': user.restaurant.id,
+                        'sort_order': next_sort_order
+                    })
+                    category_ids[category_name] = None
+                    next_sort_order += 1
 
                 # Create menu item
                 name = row.get('name', '').strip()
@@ -1150,41 +1487,69 @@ def import_menu_csv():
                 if not name or price <= 0:
                     continue
 
-                menu_item = MenuItem(
-                    name=name,
-                    description=description,
-                    price=price,
-                    category_id=category.id,
-                    is_available=True
-                )
-
-                db.session.add(menu_item)
-                added_count += 1
+                parsed_rows.append((category_name, name, description, price))
 
             except Exception as e:
                 error_count += 1
                 continue
 
+        if new_categories:
+            db.session.execute(insert(Category), new_categories)
+            category_ids.update(db.session.query(Category.name, Category.id).filter(
+                Category.restaurant_id == user.restaurant.id,
+                Category.name.in_([category['name'] for category in new_categories])
+            ).all())
+
         db.session.commit()
 
+        # Insert and commit items in batches: a large menu never becomes one huge
+        # transaction, and a failing batch only loses its own rows
+        added_count = 0
+        for batch_start in range(0, len(parsed_rows), _IMPORT_BATCH_SIZE):
+            batch = parsed_rows[batch_start:batch_start + _IMPORT_BATCH_SIZE]
+            try:
+                db.session.execute(insert(MenuItem), [
+                    {
+                        'name': name,
+                        'description': description,
+                        'price': price,
+                        'category_id': category_ids[category_name],
+                        'is_available': True
+                    }
+                    for category_name, name, description, price in batch
+                ])
+                db.session.commit()
+                added_count += len(batch)
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Menu CSV import batch failed')
+                error_count += len(batch)
+
         if added_count > 0:
             flash(f'Successfully imported {added_count} menu items', 'success')
         if error_count > 0:
             flash(f'{error_count} items had errors and were skipped', 'error')
 
     except Exception as e:
+        # Decoding errors now surface mid-import, so drop any partial work
+        db.session.rollback()
         flash(f'Error importing CSV: {str(e)}', 'error')
 
     return redirect(url_for('owner.menu'))
 
 
+@lru_cache(maxsize=1)
+def _profile_countries():
+    """Country dropdown entries; built from PricingPlan constants, so computed once per process."""
+    from app.services.geo_service import get_all_countries_for_selector
+    return tuple(get_all_countries_for_selector())
+
+
 @owner_bp.route('/profile', methods=['GET', 'POST'])
 @owner_required
 def profile():
     """View and edit restaurant profile"""
-    user = get_current_owner()
-    from app.services.geo_service import get_all_countries_for_selector
-    from app.models.website_content_models import PricingPlan
+    user = g.owner
 
     if request.method == 'POST':
         if not user.restaurant:
@@ -1215,42 +1580,12 @@ def profile():
         flash('Restaurant profile updated successfully!', 'success')
         return redirect(url_for('owner.profile'))
 
-    # Get countries list for dropdown
-    countries = get_all_countries_for_selector()
-
-    # Restaurant categories
-    categories = [
-        'Fast Food', 'Fine Dining', 'Casual Dining', 'Cafe', 'Bakery',
-        'Bar & Grill', 'Pizzeria', 'Seafood', 'Steakhouse', 'Asian',
-        'Indian', 'Mexican', 'Italian', 'Japanese', 'Chinese',
-        'Thai', 'Vietnamese', 'Mediterranean', 'Middle Eastern', 'American',
-        'Vegetarian', 'Vegan', 'Food Truck', 'Buffet', 'Other'
-    ]
-
-    # Currency options
-    currencies = [
-        {'symbol': '$', 'name': 'US Dollar (USD)'},
-        {'symbol': '€', 'name': 'Euro (EUR)'},
-        {'symbol': '£', 'name': 'British Pound (GBP)'},
-        {'symbol': '¥', 'name': 'Japanese Yen (JPY)'},
-        {'symbol': '₹', 'name': 'Indian Rupee (INR)'},
-        {'symbol': '৳', 'name': 'Bangladeshi Taka (BDT)'},
-        {'symbol': 'A$', 'name': 'Australian Dollar (AUD)'},
-        {'symbol': 'C$', 'name': 'Canadian Dollar (CAD)'},
-        {'symbol': 'RM', 'name': 'Malaysian Ringgit (MYR)'},
-        {'symbol': 'S$', 'name': 'Singapore Dollar (SGD)'},
-        {'symbol': '₱', 'name': 'Philippine Peso (PHP)'},
-        {'symbol': '฿', 'name': 'Thai Baht (THB)'},
-        {'symbol': 'R', 'name': 'South African Rand (ZAR)'},
-        {'symbol': 'AED', 'name': 'UAE Dirham (AED)'},
-        {'symbol': 'SAR', 'name': 'Saudi Riyal (SAR)'},
-    ]
-
     return render_template('owner/profile.html',
         user=user,
         restaurant=user.restaurant,
-        countries=countries,
-        categories=categories
+        countries=_profile_countries(),
+        categories=_RESTAURANT_CATEGORIES,
+        currencies=_CURRENCIES
     )
 
 
@@ -1258,7 +1593,7 @@ def profile():
 @owner_required
 def settings():
     """Restaurant settings - Tax, Invoice, etc."""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('No restaurant found', 'error')
@@ -1313,7 +1648,7 @@ def settings():
 @owner_required
 def upgrade_plan():
     """View available plans and request upgrade/downgrade"""
-    user = get_current_owner()
+    user = g.owner
     
     if not user.restaurant:
         flash('No restaurant found', 'error')
@@ -1377,14 +1712,13 @@ def upgrade_plan():
 @owner_required
 def change_plan(plan_id):
     """Request to change to a different plan"""
-    user = get_current_owner()
+    user = g.owner
     
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.dashboard', restaurant_id=1))
     
     from app.models.website_content_models import PricingPlan, Subscription
-    from datetime import datetime, timedelta
 
     new_plan = PricingPlan.query.get_or_404(plan_id)
     current_plan = user.restaurant.pricing_plan
@@ -1408,7 +1742,6 @@ def change_plan(plan_id):
     # This ensures we can bill automatically after trial or for recurring payments
     if float(new_plan.price) > 0:
         # Store trial eligibility in session for checkout page to display
-        from flask import session
         session['trial_eligible'] = can_use_trial
         session['trial_days'] = new_plan.trial_days if can_use_trial else 0
         return redirect(url_for('owner.checkout', plan_id=plan_id))
@@ -1459,7 +1792,7 @@ def change_plan(plan_id):
 @owner_required
 def checkout(plan_id):
     """Checkout page for paid plans"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('No restaurant found', 'error')
@@ -1495,7 +1828,7 @@ def checkout(plan_id):
 @owner_required
 def create_setup_intent(plan_id):
     """Create Stripe SetupIntent for trial subscriptions (no immediate charge)"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'error': 'No restaurant found'}), 400
@@ -1528,7 +1861,7 @@ def create_setup_intent(plan_id):
 @owner_required
 def create_payment_intent(plan_id):
     """Create Stripe PaymentIntent for immediate payment"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'error': 'No restaurant found'}), 400
@@ -1567,14 +1900,13 @@ def create_payment_intent(plan_id):
 @owner_required
 def confirm_payment(plan_id):
     """Confirm payment and create subscription"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'error': 'No restaurant found'}), 400
 
     from app.models.website_content_models import PricingPlan, Subscription
     from app.services.geo_service import get_country_info
-    from datetime import datetime, timedelta
 
     data = request.get_json() or {}
     gateway = data.get('gateway', 'stripe')
@@ -1675,7 +2007,7 @@ def confirm_payment(plan_id):
 def paypal_create_subscription(plan_id):
     """Create PayPal subscription"""
     try:
-        user = get_current_owner()
+        user = g.owner
 
         if not user.restaurant:
             return jsonify({'error': 'No restaurant found'}), 400
@@ -1683,7 +2015,6 @@ def paypal_create_subscription(plan_id):
         from app.services.payment_service import payment_service
         from app.models.website_content_models import PricingPlan, PaymentGateway
         from app.services.geo_service import get_country_info
-        import uuid
 
         plan = PricingPlan.query.get_or_404(plan_id)
         country_info = get_country_info()
@@ -1727,7 +2058,6 @@ def paypal_create_subscription(plan_id):
 
     except Exception as e:
         print(f"DEBUG: Exception in paypal_create_subscription: {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({
             'subscription_id': f'DEMO-SUB-{uuid.uuid4().hex[:12].upper()}',
@@ -1759,14 +2089,13 @@ def paypal_create_subscription(plan_id):
 @owner_required
 def paypal_confirm_subscription(plan_id):
     """Confirm PayPal subscription after user approval"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'error': 'No restaurant found'}), 400
 
     from app.models.website_content_models import PricingPlan, Subscription, PaymentGateway
     from app.services.geo_service import get_country_info
-    from datetime import datetime, timedelta
 
     data = request.get_json() or {}
     paypal_subscription_id = data.get('subscription_id')
@@ -1840,11 +2169,30 @@ def paypal_confirm_subscription(plan_id):
     })
 
 
+def _finalize_plan_change(user, plan, transaction, is_first_purchase):
+    """Complete the transaction, move the restaurant onto the plan and commit once."""
+    now = _request_now()
+    transaction.status = 'completed'
+    transaction.completed_at = now
+
+    user.restaurant.pricing_plan_id = plan.id
+    user.restaurant.subscription_start_date = now
+    user.restaurant.subscription_end_date = now + timedelta(days=30 if plan.price_period == 'monthly' else 365)
+
+    db.session.commit()
+
+    # Redirect to profile page for first-time users to complete details
+    if is_first_purchase:
+        flash('Please complete your restaurant profile to get started.', 'info')
+        return redirect(url_for('owner.profile'))
+    return redirect(url_for('owner.settings'))
+
+
 @owner_bp.route('/process-payment/<int:plan_id>', methods=['POST'])
 @owner_required
 def process_payment(plan_id):
     """Process payment for plan upgrade"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('No restaurant found', 'error')
@@ -1852,9 +2200,6 @@ def process_payment(plan_id):
 
     from app.models.website_content_models import PricingPlan, PaymentGateway, PaymentTransaction
     from app.services.geo_service import get_country_info
-    from datetime import datetime, timedelta
-    import uuid
-    import json
 
     plan = PricingPlan.query.get_or_404(plan_id)
     gateway_name = request.form.get('gateway')
@@ -1881,67 +2226,34 @@ def process_payment(plan_id):
         pricing_plan_id=plan.id,
         subscription_months=1 if plan.price_period == 'monthly' else 12
     )
+    # Committed together with the outcome on each path below
     db.session.add(transaction)
-    db.session.commit()
 
     # Check if this is first purchase (restaurant profile incomplete)
     is_first_purchase = not user.restaurant.country or not user.restaurant.address
 
     # For demo/sandbox mode, simulate successful payment
     if gateway.is_sandbox:
-        # Simulate successful payment
-        transaction.status = 'completed'
-        transaction.completed_at = datetime.utcnow()
         transaction.gateway_response = json.dumps({'sandbox': True, 'message': 'Simulated payment'})
-
-        # Update restaurant plan
-        user.restaurant.pricing_plan_id = plan.id
-        user.restaurant.subscription_start_date = datetime.utcnow()
-        user.restaurant.subscription_end_date = datetime.utcnow() + timedelta(days=30 if plan.price_period == 'monthly' else 365)
         user.restaurant.is_trial = False
-
-        db.session.commit()
-
         flash(f'Payment successful! You are now on the {plan.name} plan.', 'success')
+        return _finalize_plan_change(user, plan, transaction, is_first_purchase)
 
-        # Redirect to profile page for first-time users to complete details
-        if is_first_purchase:
-            flash('Please complete your restaurant profile to get started.', 'info')
-            return redirect(url_for('owner.profile'))
-        return redirect(url_for('owner.settings'))
-
-    # For live mode, redirect to actual payment gateway
-    credentials = gateway.get_active_credentials()
-
+    # For live mode, redirect to actual payment gateway; the checkout
+    # session would be created with gateway.get_active_credentials()
     if gateway_name == 'stripe':
         # Stripe checkout session would be created here
         # For now, simulate success
         flash('Stripe integration coming soon. Payment simulated.', 'info')
-        transaction.status = 'completed'
-        transaction.completed_at = datetime.utcnow()
-        user.restaurant.pricing_plan_id = plan.id
-        user.restaurant.subscription_start_date = datetime.utcnow()
-        user.restaurant.subscription_end_date = datetime.utcnow() + timedelta(days=30 if plan.price_period == 'monthly' else 365)
-        db.session.commit()
-        if is_first_purchase:
-            flash('Please complete your restaurant profile to get started.', 'info')
-            return redirect(url_for('owner.profile'))
-        return redirect(url_for('owner.settings'))
+        return _finalize_plan_change(user, plan, transaction, is_first_purchase)
 
     elif gateway_name == 'paypal':
         # PayPal order would be created here
         flash('PayPal integration coming soon. Payment simulated.', 'info')
-        transaction.status = 'completed'
-        transaction.completed_at = datetime.utcnow()
-        user.restaurant.pricing_plan_id = plan.id
-        user.restaurant.subscription_start_date = datetime.utcnow()
-        user.restaurant.subscription_end_date = datetime.utcnow() + timedelta(days=30 if plan.price_period == 'monthly' else 365)
-        db.session.commit()
-        if is_first_purchase:
-            flash('Please complete your restaurant profile to get started.', 'info')
-            return redirect(url_for('owner.profile'))
-        return redirect(url_for('owner.settings'))
+        return _finalize_plan_change(user, plan, transaction, is_first_purchase)
 
+    # Keep the pending transaction on record
+    db.session.commit()
     flash('Unknown payment gateway', 'error')
     return redirect(url_for('owner.checkout', plan_id=plan_id))
 
@@ -1952,7 +2264,7 @@ def process_payment(plan_id):
 @owner_required
 def cancel_subscription():
     """Cancel current subscription"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('No restaurant found', 'error')
@@ -1960,7 +2272,6 @@ def cancel_subscription():
 
     from app.models.website_content_models import Subscription, PricingPlan
     from app.services.payment_service import payment_service
-    from datetime import datetime
 
     subscription = Subscription.query.filter_by(restaurant_id=user.restaurant.id).first()
 
@@ -2029,14 +2340,13 @@ def cancel_subscription():
 @owner_required
 def reactivate_subscription():
     """Reactivate a cancelled subscription (before end of period)"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.dashboard', restaurant_id=1))
 
     from app.models.website_content_models import Subscription
-    from datetime import datetime
 
     subscription = Subscription.query.filter_by(restaurant_id=user.restaurant.id).first()
 
@@ -2068,7 +2378,7 @@ def reactivate_subscription():
 @owner_required
 def tables():
     """Table management page"""
-    user = get_current_owner()
+    user = g.owner
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.dashboard', restaurant_id=1))
@@ -2083,7 +2393,7 @@ def add_table():
     """Add a new table"""
     from app.services.qr_service import generate_printable_table_qr
 
-    user = get_current_owner()
+    user = g.owner
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.tables'))
@@ -2131,7 +2441,7 @@ def add_table():
 @owner_required
 def edit_table(table_id):
     """Edit a table"""
-    user = get_current_owner()
+    user = g.owner
     table = Table.query.filter_by(id=table_id, restaurant_id=user.restaurant.id).first()
 
     if not table:
@@ -2159,7 +2469,7 @@ def edit_table(table_id):
 @owner_required
 def delete_table(table_id):
     """Delete a table"""
-    user = get_current_owner()
+    user = g.owner
     table = Table.query.filter_by(id=table_id, restaurant_id=user.restaurant.id).first()
 
     if not table:
@@ -2168,10 +2478,10 @@ def delete_table(table_id):
 
     # Delete QR code file
     if table.qr_code_path:
-        import os
-        qr_path = os.path.join(current_app.config['QR_CODE_FOLDER'], table.qr_code_path)
-        if os.path.exists(qr_path):
-            os.remove(qr_path)
+        try:
+            os.unlink(os.path.join(current_app.config['QR_CODE_FOLDER'], table.qr_code_path))
+        except FileNotFoundError:
+            pass
 
     db.session.delete(table)
     db.session.commit()
@@ -2185,7 +2495,7 @@ def regenerate_table_qr(table_id):
     """Regenerate QR code for a table"""
     from app.services.qr_service import generate_printable_table_qr
 
-    user = get_current_owner()
+    user = g.owner
     table = Table.query.filter_by(id=table_id, restaurant_id=user.restaurant.id).first()
 
     if not table:
@@ -2203,19 +2513,28 @@ def regenerate_table_qr(table_id):
     return redirect(url_for('owner.tables'))
 
 
+def _store_table_qr_paths(generated):
+    """Write generated (table_id, filename) pairs back in one executemany UPDATE."""
+    if generated:
+        db.session.execute(update(Table), [
+            {'id': table_id, 'qr_code_path': filename} for table_id, filename in generated
+        ])
+
+
 @owner_bp.route('/tables/regenerate-all', methods=['POST'])
 @owner_required
 def regenerate_all_qrs():
     """Regenerate QR codes for all tables"""
     from app.services.qr_service import generate_all_table_qrs
 
-    user = get_current_owner()
+    user = g.owner
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.tables'))
 
     try:
         generated = generate_all_table_qrs(user.restaurant)
+        _store_table_qr_paths(generated)
         db.session.commit()
         flash(f'Regenerated QR codes for {len(generated)} tables!', 'success')
     except Exception as e:
@@ -2228,10 +2547,8 @@ def regenerate_all_qrs():
 @owner_required
 def download_table_qr(table_id):
     """Download printable QR code for a table"""
-    from flask import send_file
-    import os
 
-    user = get_current_owner()
+    user = g.owner
     table = Table.query.filter_by(id=table_id, restaurant_id=user.restaurant.id).first()
 
     if not table or not table.qr_code_path:
@@ -2254,9 +2571,9 @@ def download_table_qr(table_id):
 @owner_required
 def add_bulk_tables():
     """Add multiple tables at once"""
-    from app.services.qr_service import generate_printable_table_qr
+    from app.services.qr_service import generate_table_qrs
 
-    user = get_current_owner()
+    user = g.owner
     if not user.restaurant:
         flash('No restaurant found', 'error')
         return redirect(url_for('owner.tables'))
@@ -2277,27 +2594,22 @@ def add_bulk_tables():
         flash('Count must be between 1 and 100', 'error')
         return redirect(url_for('owner.tables'))
 
-    added = 0
-    for i in range(count):
-        table_num = start_from + i
-        existing = Table.query.filter_by(restaurant_id=user.restaurant.id, table_number=table_num).first()
-        if not existing:
-            table = Table(
-                table_number=table_num,
-                capacity=capacity,
-                restaurant_id=user.restaurant.id
-            )
-            db.session.add(table)
-            db.session.flush()
-
-            try:
-                qr_filename = generate_printable_table_qr(user.restaurant, table)
-                table.qr_code_path = qr_filename
-            except:
-                pass
-
-            added += 1
-
+    rid = user.restaurant.id
+    table_numbers = range(start_from, start_from + count)
+    existing_numbers = set(db.session.scalars(
+        select(Table.table_number).where(Table.restaurant_id == rid, Table.table_number.in_(table_numbers))
+    ))
+    new_numbers = [n for n in table_numbers if n not in existing_numbers]
+
+    if new_numbers:
+        db.session.execute(insert(Table), [
+            {'table_number': n, 'capacity': capacity, 'restaurant_id': rid}
+            for n in new_numbers
+        ])
+        new_tables = Table.query.filter(Table.restaurant_id == rid, Table.table_number.in_(new_numbers)).all()
+        _store_table_qr_paths(generate_table_qrs(user.restaurant, new_tables))
+
+    added = len(new_numbers)
     db.session.commit()
     flash(f'Added {added} tables!', 'success')
     return redirect(url_for('owner.tables'))
@@ -2307,20 +2619,26 @@ def add_bulk_tables():
 @owner_required
 def change_password():
     """Change owner password"""
-    user = get_current_owner()
+    user = g.owner
 
     if request.method == 'POST':
-        current_password = request.form.get('current_password')
-        new_password = request.form.get('new_password')
-        confirm_password = request.form.get('confirm_password')
-
-        if not user.check_password(current_password):
-            flash('Current password is incorrect', 'error')
-        elif len(new_password) < 6:
-            flash('New password must be at least 6 characters', 'error')
-        elif new_password != confirm_password:
-            flash('New passwords do not match', 'error')
-        else:
+        current_password = request.form.get('current_password') or ''
+        new_password = request.form.get('new_password') or ''
+        confirm_password = request.form.get('confirm_password') or ''
+
+        # Run every check so the response time doesn't reveal which one failed
+        current_password_ok = user.check_password(current_password)
+        errors = []
+        if not current_password_ok:
+            errors.append('Current password is incorrect')
+        if len(new_password) < 6:
+            errors.append('New password must be at least 6 characters')
+        if new_password != confirm_password:
+            errors.append('New passwords do not match')
+
+        for error in errors:
+            flash(error, 'error')
+        if not errors:
             user.set_password(new_password)
             db.session.commit()
             flash('Password changed successfully', 'success')
@@ -2329,47 +2647,53 @@ def change_password():
     return render_template('owner/change_password.html', user=user)
 
 
+def _kitchen_orders_filter(restaurant_id):
+    """Active orders plus today's completed/cancelled ones for a restaurant"""
+    today_start = datetime.combine(_request_now().date(), time.min)
+
+    return db.and_(
+        Order.restaurant_id == restaurant_id,
+        db.or_(
+            Order.status.in_(['pending', 'preparing', 'ready']),
+            db.and_(
+                Order.status.in_(['completed', 'cancelled']),
+                Order.created_at >= today_start
+            )
+        )
+    )
+
+
+def _get_kitchen_orders(restaurant_id):
+    """Kitchen orders with their items and menu items loaded"""
+    return Order.query.options(
+        *_load_opts(selectinload(Order.items).joinedload(OrderItem.menu_item))
+    ).filter(_kitchen_orders_filter(restaurant_id)).order_by(Order.created_at.asc()).all()
+
+
+def _count_kitchen_statuses(statuses):
+    """Count kitchen orders per status in a single pass"""
+    stats = dict.fromkeys(('pending', 'preparing', 'ready', 'completed', 'cancelled'), 0)
+    for status in statuses:
+        if status in stats:
+            stats[status] += 1
+    return stats
+
+
 @owner_bp.route('/kitchen')
 @owner_required
 @feature_required('kitchen_display')
 def kitchen_screen():
     """Kitchen dashboard for managing all orders"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
 
     # Get all active orders (pending, preparing, ready) and recent completed
-    from datetime import datetime, timedelta
-    today = datetime.utcnow().date()
+    orders = _get_kitchen_orders(user.restaurant.id)
 
-    orders = Order.query.filter(
-        Order.restaurant_id == user.restaurant.id,
-        db.or_(
-            Order.status.in_(['pending', 'preparing', 'ready']),
-            db.and_(
-                Order.status.in_(['completed', 'cancelled']),
-                db.func.date(Order.created_at) == today
-            )
-        )
-    ).order_by(Order.created_at.asc()).all()
-
-    # Stats for kitchen dashboard
-    stats = {
-        'pending': Order.query.filter_by(restaurant_id=user.restaurant.id, status='pending').count(),
-        'preparing': Order.query.filter_by(restaurant_id=user.restaurant.id, status='preparing').count(),
-        'ready': Order.query.filter_by(restaurant_id=user.restaurant.id, status='ready').count(),
-        'completed': Order.query.filter(
-            Order.restaurant_id == user.restaurant.id,
-            Order.status == 'completed',
-            db.func.date(Order.created_at) == today
-        ).count(),
-        'cancelled': Order.query.filter(
-            Order.restaurant_id == user.restaurant.id,
-            Order.status == 'cancelled',
-            db.func.date(Order.created_at) == today
-        ).count(),
-    }
+    # Stats for kitchen dashboard, counted from the orders already fetched
+    stats = _count_kitchen_statuses(order.status for order in orders)
 
     return render_template('owner/kitchen_screen.html',
         user=user,
@@ -2386,7 +2710,7 @@ def kitchen_screen():
 @feature_required('pos_integration')
 def pos_terminal(restaurant_id):
     """POS Terminal for counter orders and payment processing"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -2428,7 +2752,7 @@ def pos_terminal(restaurant_id):
 @feature_required('pos_integration')
 def api_pos_create_order():
     """Create a new POS order"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2511,6 +2835,7 @@ def api_pos_create_order():
         order.total_price = after_discount + order.tax_amount
 
         db.session.commit()
+        _orders_status_changed(order.restaurant_id)
 
         return jsonify({
             'success': True,
@@ -2528,7 +2853,7 @@ def api_pos_create_order():
 @feature_required('pos_integration')
 def api_pos_process_payment():
     """Process payment for a POS order"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2569,6 +2894,7 @@ def api_pos_process_payment():
             order.status = 'pending'
 
         db.session.commit()
+        _orders_status_changed(order.restaurant_id)
 
         return jsonify({
             'success': True,
@@ -2586,7 +2912,7 @@ def api_pos_process_payment():
 @feature_required('pos_integration')
 def api_pos_held_orders():
     """Get all held orders"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2607,7 +2933,7 @@ def api_pos_held_orders():
 @feature_required('pos_integration')
 def api_pos_recall_order(order_id):
     """Recall a held order"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2632,7 +2958,7 @@ def api_pos_recall_order(order_id):
 @feature_required('pos_integration')
 def api_pos_delete_order(order_id):
     """Delete a held order"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2660,7 +2986,7 @@ def api_pos_delete_order(order_id):
 @feature_required('pos_integration')
 def api_pos_menu():
     """Get menu for POS"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
@@ -2680,66 +3006,78 @@ def api_pos_menu():
 @owner_required
 def api_kitchen_orders():
     """API endpoint for kitchen to fetch all orders with full details"""
-    user = get_current_owner()
+    restaurant_id = g.restaurant_id
 
-    if not user.restaurant:
+    if not restaurant_id:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
 
-    # Get all orders: active ones (pending, preparing, ready) and today's completed/cancelled
-    from datetime import datetime
-    today = datetime.utcnow().date()
-
-    orders = Order.query.filter(
-        Order.restaurant_id == user.restaurant.id,
-        db.or_(
-            Order.status.in_(['pending', 'preparing', 'ready']),
-            db.and_(
-                Order.status.in_(['completed', 'cancelled']),
-                db.func.date(Order.created_at) == today
-            )
-        )
-    ).order_by(Order.created_at.asc()).all()
+    # The kitchen polls every few seconds and usually nothing has changed, so
+    # fingerprint the order set first and answer 304 when the client is current
+    last_updated, order_count = db.session.execute(
+        select(func.max(Order.updated_at), func.count(Order.id)).where(_kitchen_orders_filter(restaurant_id))
+    ).one()
+    etag = hashlib.blake2b(f'{restaurant_id}:{last_updated}:{order_count}'.encode(), digest_size=16).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    # Get all orders: active ones (pending, preparing, ready) and today's completed/cancelled.
+    # Only the columns the kitchen needs are selected, one row per order item.
+    rows = db.session.execute(
+        select(
+            Order.id, Order.order_number, Order.table_number, Order.status, Order.created_at,
+            OrderItem.id, OrderItem.quantity, OrderItem.notes, MenuItem.name
+        ).outerjoin(OrderItem, OrderItem.order_id == Order.id).outerjoin(
+            MenuItem, MenuItem.id == OrderItem.menu_item_id
+        ).where(
+            _kitchen_orders_filter(restaurant_id)
+        ).order_by(Order.created_at.asc(), Order.id, OrderItem.id)
+    ).all()
 
     orders_data = []
-    for order in orders:
-        orders_data.append({
-            'id': order.id,
-            'order_number': order.order_number,
-            'table_number': order.table_number,
-            'status': order.status,
-            'created_at': order.created_at.strftime('%H:%M'),
-            'created_at_full': order.created_at.isoformat(),
-            'items': [
-                {
-                    'name': item.menu_item.name if item.menu_item else 'Unknown',
-                    'quantity': item.quantity,
-                    'notes': item.notes
-                }
-                for item in order.items
-            ]
-        })
+    orders_by_id = {}
+    for order_id, order_number, table_number, status, created_at, item_id, quantity, notes, item_name in rows:
+        order = orders_by_id.get(order_id)
+        if order is None:
+            order = orders_by_id[order_id] = {
+                'id': order_id,
+                'order_number': order_number,
+                'table_number': table_number,
+                'status': status,
+                'created_at': created_at.strftime('%H:%M'),
+                'created_at_full': created_at.isoformat(),
+                'items': []
+            }
+            orders_data.append(order)
+        if item_id is not None:
+            order['items'].append({
+                'name': item_name if item_name is not None else 'Unknown',
+                'quantity': quantity,
+                'notes': notes
+            })
 
-    stats = {
-        'pending': sum(1 for o in orders if o.status == 'pending'),
-        'preparing': sum(1 for o in orders if o.status == 'preparing'),
-        'ready': sum(1 for o in orders if o.status == 'ready'),
-        'completed': sum(1 for o in orders if o.status == 'completed'),
-        'cancelled': sum(1 for o in orders if o.status == 'cancelled'),
-    }
+    stats = _count_kitchen_statuses(order['status'] for order in orders_data)
 
-    return jsonify({'success': True, 'orders': orders_data, 'stats': stats})
+    response = current_app.response_class(
+        orjson.dumps({'success': True, 'orders': orders_data, 'stats': stats}),
+        mimetype='application/json'
+    )
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
 
 
 @owner_bp.route('/api/kitchen/orders/<int:order_id>/status', methods=['POST'])
 @owner_required
 def api_kitchen_update_status(order_id):
     """API endpoint to update order status from kitchen screen"""
-    user = get_current_owner()
+    restaurant_id = g.restaurant_id
 
-    if not user.restaurant:
+    if not restaurant_id:
         return jsonify({'success': False, 'message': 'No restaurant found'}), 400
 
-    order = Order.query.filter_by(id=order_id, restaurant_id=user.restaurant.id).first()
+    order = _get_restaurant_order(order_id, restaurant_id)
 
     if not order:
         return jsonify({'success': False, 'message': 'Order not found'}), 404
@@ -2747,11 +3085,12 @@ def api_kitchen_update_status(order_id):
     data = request.get_json() if request.is_json else None
     new_status = data.get('status') if data else request.form.get('status')
 
-    if new_status not in ['pending', 'preparing', 'ready', 'completed', 'cancelled']:
+    if new_status not in _VALID_ORDER_STATUSES:
         return jsonify({'success': False, 'message': 'Invalid status'}), 400
 
     order.status = new_status
     db.session.commit()
+    _orders_status_changed(order.restaurant_id)
 
     return jsonify({'success': True, 'message': f'Order updated to {new_status}', 'new_status': new_status})
 
@@ -2760,23 +3099,24 @@ def api_kitchen_update_status(order_id):
 @owner_required
 def kitchen_update_status(order_id):
     """Update order status from kitchen screen (form submission fallback)"""
-    user = get_current_owner()
+    restaurant_id = g.restaurant_id
 
-    if not user.restaurant:
+    if not restaurant_id:
         return {'success': False, 'message': 'No restaurant found'}, 400
 
-    order = Order.query.filter_by(id=order_id, restaurant_id=user.restaurant.id).first()
+    order = _get_restaurant_order(order_id, restaurant_id)
 
     if not order:
         return {'success': False, 'message': 'Order not found'}, 404
 
     new_status = request.form.get('status')
 
-    if new_status not in ['pending', 'preparing', 'ready', 'completed', 'cancelled']:
+    if new_status not in _VALID_ORDER_STATUSES:
         return {'success': False, 'message': 'Invalid status'}, 400
 
     order.status = new_status
     db.session.commit()
+    _orders_status_changed(order.restaurant_id)
 
     # If this is a regular form submission
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
@@ -2790,7 +3130,7 @@ def kitchen_update_status(order_id):
 @owner_required
 def customer_display():
     """Customer display screen showing order statuses - accessible from dashboard"""
-    user = get_current_owner()
+    user = g.owner
 
     if not user.restaurant:
         return redirect(url_for('owner.dashboard'))
@@ -2804,7 +3144,11 @@ def customer_display():
 @owner_bp.route('/<int:restaurant_id>/customer-screen')
 def customer_screen(restaurant_id):
     """Public customer display screen showing order statuses"""
-    restaurant = Restaurant.query.get_or_404(restaurant_id)
+    # The shell template reads only restaurant columns; with SQLALCHEMY_RAISELOAD
+    # on, any relationship it starts touching fails loudly instead of lazy loading
+    restaurant = db.session.get(Restaurant, restaurant_id, options=_load_opts())
+    if restaurant is None:
+        abort(404)
 
     if not restaurant.is_active:
         return "Restaurant not available", 404
@@ -2821,46 +3165,136 @@ def customer_screen(restaurant_id):
             message='This feature is not available in the current plan.'
         )
 
-    # Get orders in progress (pending, preparing, ready)
-    orders = Order.query.filter(
-        Order.restaurant_id == restaurant.id,
-        Order.status.in_(['pending', 'preparing', 'ready'])
-    ).order_by(Order.created_at.asc()).all()
+    # The page is a static shell; its script fetches the orders from
+    # api_orders_status on load and keeps them fresh from there
+    return render_template('owner/customer_screen_v2.html', restaurant=restaurant)
 
-    # Group orders by status
-    pending_orders = [o for o in orders if o.status == 'pending']
-    preparing_orders = [o for o in orders if o.status == 'preparing']
-    ready_orders = [o for o in orders if o.status == 'ready']
 
-    return render_template('owner/customer_screen_v2.html',
-        restaurant=restaurant,
-        pending_orders=pending_orders,
-        preparing_orders=preparing_orders,
-        ready_orders=ready_orders
+def _active_order_buckets(restaurant_id, bind_arguments):
+    """In-progress orders of a restaurant grouped by status"""
+    # Rows are streamed from the cursor in batches rather than fetched all at once
+    rows = db.session.execute(
+        _active_orders_stmt, {'rid': restaurant_id, 'statuses': _ACTIVE_ORDER_STATUSES},
+        bind_arguments=bind_arguments
     )
 
+    buckets = {'pending': [], 'preparing': [], 'ready': []}
+    for status, group in groupby(rows, key=itemgetter(0)):
+        buckets[status] = [dict(zip(_SCREEN_ORDER_FIELDS, _screen_order_values(row))) for row in group]
+    return buckets
+
+
+def _active_orders_json(restaurant_id, bind_arguments):
+    """In-progress orders of a restaurant grouped by status, encoded as a JSON object"""
+    if bind_arguments['bind'].dialect.name == 'postgresql':
+        # Let the database aggregate straight to JSON; no Python row or dict per order
+        return db.session.execute(
+            _active_orders_json_stmt, {'rid': restaurant_id}, bind_arguments=bind_arguments
+        ).scalar_one().encode()
+    return orjson.dumps(_active_order_buckets(restaurant_id, bind_arguments))
+
+
+def _encode_orders_toon(buckets):
+    """Encode the customer screen payload as TOON: field names once per bucket, then one row per order"""
+    lines = ['success: true', 'orders:']
+    for status in _ACTIVE_ORDER_STATUSES:
+        orders = buckets[status]
+        if not orders:
+            lines.append(f'  {status}[0]:')
+            continue
+        lines.append(f"  {status}[{len(orders)}]{{{','.join(_SCREEN_ORDER_FIELDS)}}}:")
+        for order in orders:
+            lines.append('    ' + ','.join(_toon_value(order[field]) for field in _SCREEN_ORDER_FIELDS))
+    return '\n'.join(lines).encode()
+
+
+def _toon_value(value):
+    """Format a TOON scalar, quoting strings that would otherwise be ambiguous"""
+    if value is None:
+        return 'null'
+    if isinstance(value, (int, float)):
+        return str(value)
+    value = str(value)
+    if (not value or value != value.strip() or value in ('true', 'false', 'null')
+            or any(c in value for c in ',:"\\[]{}\n') or _looks_numeric(value)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+def _looks_numeric(value):
+    """Check whether a string would read back as a TOON number"""
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _cache_orders_status(cache_key, payload, mimetype):
+    """Keep an encoded customer screen payload in the micro-cache and return it with its ETag"""
+    etag = hashlib.blake2b(payload, digest_size=8).hexdigest()
+    _orders_status_cache[cache_key] = (monotonic() + _ORDERS_STATUS_TTL, payload, etag, mimetype)
+    return payload, etag, mimetype
+
+
+def _orders_status_changed(restaurant_id):
+    """Tell open customer screens to refresh after an order changes"""
+    notify_order_update(restaurant_id, {'restaurant_id': restaurant_id})
+
+
+@orders_changed.connect
+def _drop_orders_status_cache(restaurant_id):
+    """Drop the cached customer-screen payload whenever the restaurant's orders change"""
+    for fmt in _ORDERS_STATUS_FORMATS:
+        _orders_status_cache.pop((restaurant_id, fmt), None)
+
 
 @owner_bp.route('/api/<int:restaurant_id>/orders-status')
 def api_orders_status(restaurant_id):
     """API endpoint for customer screen to fetch live order updates"""
-    restaurant = Restaurant.query.get_or_404(restaurant_id)
-
-    if not restaurant.is_active:
+    # Every customer screen of a restaurant polls this with identical results,
+    # so serve them all from one payload per short TTL window
+    # ?format=toon sends the same data as TOON, which states each bucket's
+    # field names once instead of repeating them on every order
+    fmt = 'toon' if request.args.get('format') == 'toon' else 'json'
+    cache_key = (restaurant_id, fmt)
+    # A refetch triggered by a push must see the change it was told about. The
+    # cache is only dropped in the worker that made the change, and the replica
+    # may lag, so it skips the cache and reads the primary (refilling the cache)
+    fresh = _wants_fresh_read()
+    cached = _orders_status_cache.get(cache_key)
+    if cached and not fresh and cached[0] > monotonic():
+        return _orders_status_response(*cached[1:])
+
+    bind_arguments = _poll_bind(fresh)
+
+    # Only the active flag is needed here, not a full Restaurant instance
+    is_active = db.session.execute(
+        select(Restaurant.is_active).where(Restaurant.id == restaurant_id), bind_arguments=bind_arguments
+    ).scalar()
+    if is_active is None:
+        abort(404)
+
+    if not is_active:
         return jsonify({'success': False, 'message': 'Restaurant not available'}), 404
 
-    # Get orders in progress
-    orders = Order.query.filter(
-        Order.restaurant_id == restaurant.id,
-        Order.status.in_(['pending', 'preparing', 'ready'])
-    ).order_by(Order.created_at.asc()).all()
+    if fmt == 'toon':
+        payload = _encode_orders_toon(_active_order_buckets(restaurant_id, bind_arguments))
+        mimetype = 'text/toon'
+    else:
+        payload = b'{"success":true,"orders":' + _active_orders_json(restaurant_id, bind_arguments) + b'}'
+        mimetype = 'application/json'
+    return _orders_status_response(*_cache_orders_status(cache_key, payload, mimetype))
 
-    return jsonify({
-        'success': True,
-        'orders': {
-            'pending': [{'id': o.id, 'order_number': o.order_number, 'table_number': o.table_number} for o in orders if o.status == 'pending'],
-            'preparing': [{'id': o.id, 'order_number': o.order_number, 'table_number': o.table_number} for o in orders if o.status == 'preparing'],
-            'ready': [{'id': o.id, 'order_number': o.order_number, 'table_number': o.table_number} for o in orders if o.status == 'ready']
-        }
-    })
+
+def _orders_status_response(payload, etag, mimetype):
+    """Response for the customer screen poll, or 304 if the client already has it"""
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(payload, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.max_age = _ORDERS_STATUS_TTL
+    return response
 
 
@@ -33,7 +33,7 @@ def get_current_owner():
     from flask import session
     user_id = session.get('owner_user_id')
     if user_id:
-        return User.query.get(user_id)
+        return User.get_with_restaurant(user_id)
     return None
 
 
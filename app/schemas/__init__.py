@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import select
 
 def validate_required_fields(data, required_fields):
     missing = [field for field in required_fields if not data.get(field)]
@@ -20,6 +21,36 @@ def role_required(*roles):
         return decorator
     return wrapper
 
+def token_claims(user):
+    """Additional JWT claims, so authenticated endpoints can skip the user lookup"""
+    return {
+        'role': user.role,
+        'uid': user.id,
+        'restaurant_id': user.restaurant.id if user.restaurant else None
+    }
+
+def get_claimed_restaurant_id():
+    """Restaurant id from the JWT claim, checked against the database so a
+    restaurant that was reassigned or deleted after the token was issued is
+    not trusted for the rest of the token's lifetime"""
+    from app import db
+    from app.models import Restaurant, User
+
+    claims = get_jwt()
+    restaurant_id = claims.get('restaurant_id')
+    if restaurant_id is not None and claims.get('uid') is not None:
+        # One primary-key lookup instead of loading the User and its Restaurant
+        owner_id = db.session.execute(
+            select(Restaurant.owner_id).where(Restaurant.id == restaurant_id)
+        ).scalar()
+        if owner_id == claims['uid']:
+            return restaurant_id
+
+    # Legacy tokens without the claims, tokens issued before the owner had a
+    # restaurant, and stale claims are resolved against the database
+    user = User.query.filter_by(public_id=get_jwt_identity()).first()
+    return user.restaurant.id if user and user.restaurant else None
+
 def json_response(data=None, message=None, status=200):
     response = {}
     if data is not None:
@@ -1,5 +1,7 @@
 import qrcode
 import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from flask import current_app
 from PIL import Image, ImageDraw, ImageFont
 
@@ -10,6 +12,9 @@ try:
 except AttributeError:
     LANCZOS = Image.ANTIALIAS
 
+# Rendering is mostly PNG encoding and file writes, so a few threads overlap well
+QR_RENDER_WORKERS = 8
+
 
 def generate_qr_code(restaurant_public_id, table_number, access_token):
     """Generate QR code for a specific table"""
@@ -38,6 +43,11 @@ def generate_qr_code(restaurant_public_id, table_number, access_token):
     return filename
 
 
+def restaurant_qr_filename(restaurant_public_id):
+    """File name of a restaurant's main QR code inside QR_CODE_FOLDER"""
+    return f"restaurant_{restaurant_public_id}_main.png"
+
+
 def generate_restaurant_qr_code(restaurant_public_id, restaurant_name=None):
     """Generate main QR code for a restaurant (links to restaurant menu page)"""
     qr_folder = current_app.config['QR_CODE_FOLDER']
@@ -58,7 +68,7 @@ def generate_restaurant_qr_code(restaurant_public_id, restaurant_name=None):
 
     img = qr.make_image(fill_color="black", back_color="white")
 
-    filename = f"restaurant_{restaurant_public_id}_main.png"
+    filename = restaurant_qr_filename(restaurant_public_id)
     filepath = os.path.join(qr_folder, filename)
     img.save(filepath)
 
@@ -211,20 +221,46 @@ def generate_printable_table_qr(restaurant, table, qr_settings=None):
     return filename
 
 
-def generate_all_table_qrs(restaurant):
-    """Generate printable QR codes for all tables in a restaurant"""
+def _snapshot(obj, *fields):
+    """Copy the given attributes of a model instance into a plain object"""
+    return SimpleNamespace(**{field: getattr(obj, field) for field in fields})
+
+
+def generate_table_qrs(restaurant, tables, max_workers=QR_RENDER_WORKERS):
+    """
+    Generate printable QR codes for several tables on a thread pool.
+    Returns (table_id, filename) pairs for the tables that rendered; the caller
+    is responsible for storing the filenames.
+    """
     from app.models import QRTemplateSettings
 
-    qr_settings = QRTemplateSettings.get_settings()
-    generated = []
+    # The workers only get plain copies: model instances belong to this thread's
+    # session, and touching them from another thread could trigger lazy loads
+    qr_settings = _snapshot(
+        QRTemplateSettings.get_settings(), 'primary_color', 'secondary_color', 'qr_size',
+        'scan_text', 'show_powered_by', 'powered_by_text', 'saas_name'
+    )
+    restaurant = _snapshot(restaurant, 'name', 'public_id')
+    tables = [_snapshot(table, 'id', 'table_number', 'table_name', 'access_token') for table in tables]
+    app = current_app._get_current_object()
+
+    def render(table):
+        with app.app_context():
+            try:
+                return table.id, generate_printable_table_qr(restaurant, table, qr_settings)
+            except Exception as e:
+                app.logger.error(f"QR generation failed for table {table.id}: {e}")
+                return table.id, None
 
-    for table in restaurant.tables:
-        if table.is_active:
-            filename = generate_printable_table_qr(restaurant, table, qr_settings)
-            table.qr_code_path = filename
-            generated.append(table)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(render, tables))
 
-    return generated
+    return [(table_id, filename) for table_id, filename in results if filename]
+
+
+def generate_all_table_qrs(restaurant):
+    """Generate printable QR codes for all active tables in a restaurant"""
+    return generate_table_qrs(restaurant, [table for table in restaurant.tables if table.is_active])
 
 
 def get_qr_code_url(filename):
@@ -1,11 +1,30 @@
+import logging
+
+from blinker import Namespace
 from app import socketio
 from flask_socketio import emit, join_room, leave_room
 
+logger = logging.getLogger(__name__)
+
+_signals = Namespace()
+# Sent with the restaurant id whenever one of its orders is created or changes status
+orders_changed = _signals.signal('orders-changed')
+
 def notify_new_order(restaurant_id, order_data):
-    socketio.emit('new_order', order_data, room=f'restaurant_{restaurant_id}')
+    _notify('new_order', restaurant_id, order_data)
 
 def notify_order_update(restaurant_id, order_data):
-    socketio.emit('order_update', order_data, room=f'restaurant_{restaurant_id}')
+    _notify('order_update', restaurant_id, order_data)
+
+def _notify(event, restaurant_id, data):
+    # In-process only: drops this worker's cached customer-screen payload. Other
+    # workers' screens hear about the change through the Socket.IO message queue
+    orders_changed.send(restaurant_id)
+    try:
+        socketio.emit(event, data, room=f'restaurant_{restaurant_id}')
+    except Exception as e:
+        # Screens still pick the change up on their fallback poll
+        logger.warning(f"Failed to push {event} for restaurant {restaurant_id}: {e}")
 
 @socketio.on('join_restaurant')
 def handle_join(data):
@@ -28,4 +47,3 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     pass
-
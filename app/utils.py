@@ -0,0 +1,14 @@
+"""
+Shared helpers for request handling
+"""
+import csv
+import io
+
+
+def csv_upload_reader(file):
+    """
+    DictReader over an uploaded CSV file.
+    The upload is decoded lazily instead of being read into memory first, and
+    utf-8-sig drops the BOM that spreadsheet exports put before the header.
+    """
+    return csv.DictReader(io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline=''))
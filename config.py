@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 
 load_dotenv()
 
@@ -8,6 +9,19 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///restaurant_platform.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Raise on un-eager-loaded relationships in owner views (catch N+1 in dev/tests)
+    SQLALCHEMY_RAISELOAD = os.getenv('SQLALCHEMY_RAISELOAD', 'false').lower() == 'true'
+    # Optional read replica for the customer screen's background polls
+    SQLALCHEMY_BINDS = {'replica': os.environ['DATABASE_REPLICA_URL']} if os.getenv('DATABASE_REPLICA_URL') else {}
+    # Set DATABASE_POOLER=pgbouncer when Postgres sits behind pgbouncer in transaction
+    # mode: pgbouncer shares the server connections, so don't keep a second pool here
+    if os.getenv('DATABASE_POOLER', '').lower() == 'pgbouncer':
+        SQLALCHEMY_ENGINE_OPTIONS = {'poolclass': NullPool}
+
+    # Broker shared by all workers (e.g. redis://localhost:6379/0, needs the redis
+    # package) so order pushes reach screens connected to any worker. Without it
+    # a push only reaches clients of the worker that handled the change.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
 
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-dev-secret')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -15,6 +29,10 @@ class Config:
 
     WTF_CSRF_ENABLED = True
 
+    # Reject oversized uploads (logos, menu images, CSV imports) from the
+    # Content-Length header, before any of the body is read
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+
     # Template settings - disable caching for development
     TEMPLATES_AUTO_RELOAD = True
     SEND_FILE_MAX_AGE_DEFAULT = 0
@@ -0,0 +1,35 @@
+"""Key the in-progress order partial index on (restaurant_id, created_at)
+
+Revision ID: order_active_index_rekey
+Revises: order_keyset_index
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'order_active_index_rekey'
+down_revision = 'order_keyset_index'
+branch_labels = None
+depends_on = None
+
+ACTIVE_PREDICATE = sa.text("status IN ('pending', 'preparing', 'ready')")
+
+
+def upgrade():
+    # With status in the key the partial index duplicated
+    # ix_order_restaurant_status_created; status now only appears in the predicate
+    op.drop_index('ix_order_active', table_name='orders')
+    op.create_index(
+        'ix_order_active', 'orders', ['restaurant_id', 'created_at'], unique=False,
+        postgresql_where=ACTIVE_PREDICATE, sqlite_where=ACTIVE_PREDICATE,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_order_active', table_name='orders')
+    op.create_index(
+        'ix_order_active', 'orders', ['restaurant_id', 'status', 'created_at'], unique=False,
+        postgresql_where=ACTIVE_PREDICATE, sqlite_where=ACTIVE_PREDICATE,
+    )
@@ -0,0 +1,30 @@
+"""Add a partial index over in-progress orders
+
+Revision ID: order_active_partial_index
+Revises: order_status_created_index
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision = 'order_active_partial_index'
+down_revision = 'order_status_created_index'
+branch_labels = None
+depends_on = None
+
+ACTIVE_PREDICATE = sa.text("status IN ('pending', 'preparing', 'ready')")
+
+
+def upgrade():
+    # Only pending/preparing/ready rows are indexed; the customer screen's
+    # status IN (...) filter matches the predicate so the planner can use it
+    op.create_index(
+        'ix_order_active', 'orders', ['restaurant_id', 'status', 'created_at'], unique=False,
+        postgresql_where=ACTIVE_PREDICATE, sqlite_where=ACTIVE_PREDICATE,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_order_active', table_name='orders')
@@ -0,0 +1,26 @@
+"""Extend the (restaurant_id, created_at) order index with id for keyset pagination
+
+Revision ID: order_keyset_index
+Revises: order_active_partial_index
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision = 'order_keyset_index'
+down_revision = 'order_active_partial_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The orders list pages on (created_at, id); with id in the index each page
+    # is a single range scan, and the old two-column index becomes redundant
+    op.create_index('ix_order_restaurant_created_id', 'orders', ['restaurant_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_order_restaurant_created', table_name='orders')
+
+
+def downgrade():
+    op.create_index('ix_order_restaurant_created', 'orders', ['restaurant_id', 'created_at'], unique=False)
+    op.drop_index('ix_order_restaurant_created_id', table_name='orders')
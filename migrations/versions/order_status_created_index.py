@@ -0,0 +1,26 @@
+"""Replace the (restaurant_id, status) order index with (restaurant_id, status, created_at)
+
+Revision ID: order_status_created_index
+Revises: owner_query_indexes
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision = 'order_status_created_index'
+down_revision = 'owner_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # In-progress order scans (customer screen, kitchen) filter by status and
+    # order by created_at; the new index covers both and makes the old one redundant
+    op.create_index('ix_order_restaurant_status_created', 'orders', ['restaurant_id', 'status', 'created_at'], unique=False)
+    op.drop_index('ix_order_restaurant_status', table_name='orders')
+
+
+def downgrade():
+    op.create_index('ix_order_restaurant_status', 'orders', ['restaurant_id', 'status'], unique=False)
+    op.drop_index('ix_order_restaurant_status_created', table_name='orders')
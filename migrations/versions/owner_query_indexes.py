@@ -0,0 +1,27 @@
+"""Add indexes for owner dashboard and order listing queries
+
+Revision ID: owner_query_indexes
+Revises: phase3_enterprise_features
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision = 'owner_query_indexes'
+down_revision = 'phase3_enterprise_features'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Restaurant-scoped date range scans (dashboard, orders list)
+    op.create_index('ix_order_restaurant_created', 'orders', ['restaurant_id', 'created_at'], unique=False)
+
+    # Category lookups by restaurant
+    op.create_index('ix_categories_restaurant_id', 'categories', ['restaurant_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_categories_restaurant_id', table_name='categories')
+    op.drop_index('ix_order_restaurant_created', table_name='orders')